@@ -1,39 +1,207 @@
+import sys
 from os import getcwd, path
 
 import click
 
 from .formatting import Formatter as f
-from .generation.core import generate_key
-from .testing.utils import test_dir, test_file, test_test_file
+from .generation.bench import (
+    ALPHABETS,
+    BATCH_SIZES,
+    LENGTHS,
+    check_uniformity,
+    measure_throughput,
+    output_throughput,
+    output_uniformity,
+    write_bench_report,
+)
+from .generation.index import KeyIndex
+from .generation.unique import check_key_space, parallel_key_batches, unique_key_batches
+from .generation.writers import KEY_FORMATS, create_writer, open_output
+from .testing.baseline import compare_baseline as compare_baseline_timings
+from .testing.baseline import load_baseline, output_regressions, parse_percentage
+from .testing.baseline import save_baseline as write_baseline
+from .testing.cache import TestCache
+from .testing.discovery import DiscoveryIndex
+from .testing.memory import output_memory
+from .testing.profiling import PROFILE_DIR, output_profile
+from .testing.reporters import get_reporter, set_reporter
+from .testing.reports import REPORT_FORMATS, write_report
+from .testing.results import collector
+from .testing.runner import run_files
+from .testing.settings import Settings
+from .testing.utils import IGNORE_DIRS, collect_files
+from .testing.watch import watch as watch_files
 
 
 @click.group("samutil")
 @click.version_option("0.0.75")
-def main():
+@click.option(
+    "--color/--no-color",
+    default=None,
+    help="Color output. By default, only output to a terminal is colored.",
+)
+def main(color: bool = None):
     """Samutil Python CLI"""
-    pass
+    if color is not None:
+        f.set_color(color)
 
 
 @main.command("test")
 @click.argument("filenames", nargs=-1, required=False)
-def test(filenames: tuple[click.Path]):
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes to run test files on. 0 uses every core.",
+)
+@click.option(
+    "--report",
+    type=(click.Choice(REPORT_FORMATS), click.Path(dir_okay=False)),
+    default=None,
+    help="Write a machine-readable report of the run, e.g. --report junit results.xml",
+)
+@click.option(
+    "--save-baseline",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Save the timing stats of every case to a baseline file.",
+)
+@click.option(
+    "--compare-baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Fail any case whose median time regressed against a baseline file.",
+)
+@click.option(
+    "--max-regression",
+    type=str,
+    default="10%",
+    help="How much slower a case may get before --compare-baseline fails it.",
+)
+@click.option(
+    "-q",
+    "--quiet",
+    is_flag=True,
+    default=False,
+    help="Print a dot for each passing case, and only print failures in full.",
+)
+@click.option(
+    "--changed",
+    is_flag=True,
+    default=False,
+    help=(
+        "Only run files whose contents or local imports changed since their last "
+        "green run."
+    ),
+)
+@click.option(
+    "--import-all",
+    is_flag=True,
+    default=False,
+    help=(
+        "Import every file to look for tests, instead of only files that use the test "
+        "decorators or UnitTest."
+    ),
+)
+@click.option(
+    "-w",
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="Keep running, and re-run files whose sources or local imports change.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Fail any case which runs for longer than this many seconds.",
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    default=False,
+    help="Measure the peak and net memory allocated by every case, using tracemalloc.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help=(
+        "Profile every case with cProfile, and print the functions which took the "
+        "most time."
+    ),
+)
+@click.option(
+    "--profile-threshold",
+    type=float,
+    default=0.0,
+    help="Only keep the profiles of cases which took at least this many seconds.",
+)
+@click.option(
+    "--profile-dir",
+    type=click.Path(file_okay=False),
+    default=PROFILE_DIR,
+    help="Directory to write each suite's .pstats and collapsed stack files to.",
+)
+@click.option(
+    "--profile-top",
+    type=int,
+    default=20,
+    help="Number of functions to print with --profile.",
+)
+def test(
+    filenames: tuple[click.Path],
+    timeout: float = None,
+    watch: bool = False,
+    changed: bool = False,
+    import_all: bool = False,
+    quiet: bool = False,
+    jobs: int = 1,
+    report: tuple = None,
+    save_baseline: click.Path = None,
+    compare_baseline: click.Path = None,
+    max_regression: str = "10%",
+    memory: bool = False,
+    profile: bool = False,
+    profile_threshold: float = 0.0,
+    profile_dir: click.Path = PROFILE_DIR,
+    profile_top: int = 20,
+):
+    try:
+        max_regression = parse_percentage(max_regression)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--max-regression")
+
+    Settings.update(
+        quiet=quiet,
+        timeout=timeout,
+        color=f.color,
+        memory=memory,
+        profile=profile,
+        profile_threshold=profile_threshold,
+    )
+    set_reporter(None)
+    reporter = get_reporter()
+
     if len(filenames) == 0:
-        test_dir(".", search=True)
+        roots = ["."]
+        # Discovery only imports files which use the test decorators, so an error
+        # importing one is reported, unless every file is imported
+        search = import_all
     else:
         if filenames[0] == ".":
             print(f.error("To test an entire directory, use '*'"))
             return
+
+        roots = []
         for file in filenames:
             filename = click.format_filename(file)
-            ignore_dirs = ["__pycache__", "venv", "env", "virtualenv", "build", "dist"]
             if path.isdir(filename):
-                if filename not in ignore_dirs:
-                    test_dir(filename, search=False)
+                if filename not in IGNORE_DIRS:
+                    roots.append(filename)
             elif path.isfile(filename) and filename.endswith(".py"):
-                if filename.endswith(".test.py"):
-                    test_test_file(filename)
-                else:
-                    test_file(filename, search=False)
+                roots.append(filename)
             else:
                 print(
                     f.warning(
@@ -42,23 +210,239 @@ def test(filenames: tuple[click.Path]):
                         "as it is not a directory or valid test file.",
                     )
                 )
+        search = False
+
+    def collect() -> list:
+        targets = []
+        for root in roots:
+            if path.isdir(root):
+                targets.extend(collect_files(root))
+            elif path.isfile(root):
+                targets.append(root)
+
+        if not import_all:
+            index = DiscoveryIndex()
+            targets = index.discover(targets)
+            index.save()
+
+        return targets
+
+    def run(targets: list):
+        collector.reset()
+
+        cache = TestCache()
+        if changed:
+            unchanged = len(targets)
+            targets = cache.changed(targets)
+            unchanged -= len(targets)
+            if unchanged:
+                print(
+                    f.info(
+                        "Skipping",
+                        unchanged,
+                        "file(s) unchanged since their last green run",
+                    )
+                )
+
+        run_files(targets, search=search, jobs=jobs)
+        reporter.flush()
+
+        if compare_baseline:
+            regressions = compare_baseline_timings(
+                collector.files, load_baseline(compare_baseline), max_regression
+            )
+            output_regressions(regressions, max_regression)
+
+        # Only once every check which can fail a case has run
+        cache.update(collector.files)
+        cache.save()
+
+        if memory:
+            output_memory(collector.files)
+        if profile:
+            output_profile(collector.files, profile_dir, profile_top)
+
+        reporter.summary(collector)
+
+        if save_baseline:
+            write_baseline(collector.files, save_baseline)
+            print(f.success("Saved baseline to", f.bold(save_baseline)))
+
+        if report:
+            kind, filename = report
+            write_report(kind, collector.files, filename)
+            print(f.success("Wrote", kind, "report to", f.bold(filename)))
+
+    if watch:
+        watch_files(collect, run)
+        return
+
+    run(collect())
+    if not collector.passed:
+        sys.exit(1)
 
 
 @main.command("key")
 @click.option("-l", "--length", type=int, default=6)
 @click.option("-a", "--amount", type=int, default=1)
-@click.option("-o", "--out", type=str, default=None)
-def key(length: int = 6, amount: int = 1, out: click.Path = None):
-    tokens = []
-    for _ in range(amount):
-        tokens.append(generate_key(length))
-
-    if out:
-        with open(out, "w+") as o:
-            o.write("\n".join(tokens))
-            print(f.success("Wrote tokens to", f.bold(out)))
-    else:
-        print("\n" + "\n".join(tokens) + "\n")
+@click.option(
+    "-o",
+    "--out",
+    type=str,
+    default=None,
+    help="File to write keys to, or '-' for stdout.",
+)
+@click.option(
+    "-f", "--format", "format_", type=click.Choice(KEY_FORMATS), default="text"
+)
+@click.option(
+    "--gzip",
+    "compress",
+    is_flag=True,
+    help="Compress the keys written with gzip. Without -o, they're written to stdout.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of worker processes to generate keys on. 0 uses every core.",
+)
+@click.option("--unique", is_flag=True, help="Guarantee that no key is repeated.")
+@click.option(
+    "--existing",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help=(
+        "A file of keys, 1 per line, which new keys must not collide with. "
+        "Implies --unique."
+    ),
+)
+def key(
+    length: int = 6,
+    amount: int = 1,
+    out: click.Path = None,
+    workers: int = 1,
+    unique: bool = False,
+    existing: click.Path = None,
+    format_: str = "text",
+    compress: bool = False,
+):
+    if compress and not out:
+        # Compressed keys can't be mixed with the text around them on the terminal
+        out = "-"
+    if existing and out and path.abspath(existing) == path.abspath(out):
+        print(f.error("The output file can't be the file of existing keys"))
+        sys.exit(1)
+
+    index = KeyIndex(existing) if existing else None
+    try:
+        if unique or index is not None:
+            try:
+                check_key_space(amount, length, existing=index)
+            except ValueError as e:
+                print(f.error(str(e)))
+                sys.exit(1)
+            batches = unique_key_batches(
+                amount, length, workers=workers, existing=index
+            )
+        else:
+            batches = parallel_key_batches(amount, length, workers=workers)
+
+        if out:
+            with open_output(out, compress) as o:
+                create_writer(o, format_).write_all(batches)
+            if out != "-":
+                print(f.success("Wrote tokens to", f.bold(out)))
+        else:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+            create_writer(sys.stdout.buffer, format_).write_all(batches)
+            sys.stdout.buffer.flush()
+            sys.stdout.write("\n\n")
+    finally:
+        if index is not None:
+            index.close()
+
+
+@main.group("bench")
+def bench():
+    """Benchmark samutil itself"""
+    pass
+
+
+@bench.command("key")
+@click.option(
+    "-l", "--length", "lengths", type=int, multiple=True, help="Key lengths to measure."
+)
+@click.option(
+    "--alphabet",
+    "alphabets",
+    type=click.Choice(list(ALPHABETS)),
+    multiple=True,
+    help="Alphabets to measure.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_sizes",
+    type=int,
+    multiple=True,
+    help=(
+        "Keys generated per batch. 1 measures generate_key, and 0 the default batch "
+        "size."
+    ),
+)
+@click.option(
+    "--samples",
+    type=int,
+    default=1_000_000,
+    help="Characters drawn per uniformity check.",
+)
+@click.option(
+    "--min-time",
+    type=float,
+    default=0.2,
+    help="Minimum seconds to time each measurement for.",
+)
+@click.option(
+    "--alpha",
+    type=float,
+    default=0.001,
+    help="Uniformity checks fail below this p-value.",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the results to a JSON file.",
+)
+def bench_key(
+    lengths: tuple = (),
+    alphabets: tuple = (),
+    batch_sizes: tuple = (),
+    samples: int = 1_000_000,
+    min_time: float = 0.2,
+    alpha: float = 0.001,
+    report: click.Path = None,
+):
+    alphabets = alphabets or tuple(ALPHABETS)
+    throughput = [
+        measure_throughput(alphabet, length, batch_size, min_time)
+        for alphabet in alphabets
+        for length in lengths or LENGTHS
+        for batch_size in batch_sizes or BATCH_SIZES
+    ]
+    output_throughput(throughput)
+
+    uniformity = [check_uniformity(alphabet, samples) for alphabet in alphabets]
+    output_uniformity(uniformity, alpha)
+
+    if report:
+        write_bench_report(throughput, uniformity, report)
+        print(f.success("\nWrote benchmark report to", f.bold(report)))
+
+    if not all(r.passed(alpha) for r in uniformity):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,14 @@
-from os import system
-from sys import platform
-from typing import Iterable
+import os
+import sys
+from typing import Dict, Iterable, Iterator, Optional, Sequence, TextIO, Tuple, Union
 
 
 class ColorCodes:
     """
     A class representation of the color codes used by `samutil.Formatter`
     """
+
+    __slots__ = ()
     CYAN = "\033[96m"
     WHITE = "\033[97m"
     MAGENTA = "\033[95m"
@@ -20,41 +22,205 @@ class ColorCodes:
 
 
 class ColoredText(ColorCodes):
-    def __init__(self, code: str, val: str):
-        self.code = code
-        self.val = val
+    """
+    Text in a color, which can be concatenated with strings and other ColoredText.
+    Concatenating only links both sides together in a new ColoredText, so nothing is
+    copied until the whole tree is converted with `str`, or written with `write_to`.
+    """
+
+    __slots__ = ("code", "val", "_children", "_text")
+
+    def __init__(
+        self,
+        code: str,
+        val: str,
+        children: Tuple[Union[str, "ColoredText"], ...] = None,
+    ):
+        set_attribute = object.__setattr__
+        set_attribute(self, "code", code)
+        set_attribute(self, "val", val)
+        set_attribute(self, "_children", children)
+        set_attribute(self, "_text", None)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError("ColoredText is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("ColoredText is immutable")
+
+    def __reduce__(self):
+        return ColoredText, (self.code, self.val, self._children)
 
-    def __add__(self, rhs: str) -> str:
+    def spans(self) -> Iterator[str]:
+        """
+        Yield the pieces of text which make up this ColoredText, in order.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if type(node) is str:
+                yield node
+            elif node._text is not None:
+                yield node._text
+            elif node._children is None:
+                yield node.code
+                yield node.val
+                yield node.END
+            else:
+                stack.extend(reversed(node._children))
+
+    def write_to(self, stream: TextIO):
+        """
+        Write every span to `stream`, without joining them into 1 string first.
+        """
+        write = stream.write
+        for span in self.spans():
+            write(span)
+
+    def __add__(self, rhs: Union[str, "ColoredText"]) -> "ColoredText":
         """
         Defines what to do in the case of a concatenation like ColoredText + "Hello".
         """
-        if isinstance(rhs, str):
-            return self.code + self.val + self.END + rhs
-        elif isinstance(rhs, ColoredText):
-            return self.code + self.val + self.END + rhs.code + rhs.val
-        else:
-            raise TypeError(
-                f"Operand '+' is not supported between types {type(self)} and {type(rhs)}."
-            )
+        if isinstance(rhs, (str, ColoredText)):
+            return ColoredText("", "", (self, rhs))
+        raise TypeError(
+            f"Operand '+' is not supported between types {type(self)} and {type(rhs)}."
+        )
 
-    def __radd__(self, lhs: str) -> str:
+    def __radd__(self, lhs: str) -> "ColoredText":
         """
         Defines what to do in the case of a concatenation like "Hello" + ColoredText.
         """
         if isinstance(lhs, str):
-            return lhs + f"{self.code}{self.val}{self.END}"
+            return ColoredText("", "", (lhs, self))
+        return NotImplemented
+
+    def __len__(self) -> int:
+        return len(str(self))
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
 
     def __repr__(self) -> str:
         """
         Format the ColoredText object into a string
         """
-        return f"{self.code}{self.val}"
+        if self._children is None:
+            return f"{self.code}{self.val}"
+        return str(self)
 
     def __str__(self) -> str:
         """
         Format the ColoredText object into a string
         """
-        return f"{self.code}{self.val}{self.END}"
+        if self._text is None:
+            object.__setattr__(self, "_text", "".join(self.spans()))
+        return self._text
+
+
+def supports_color(stream: TextIO = None) -> bool:
+    """
+    Decide whether to color text written to `stream`, stdout by default.
+    NO_COLOR turns color off and FORCE_COLOR turns it on, otherwise text is only colored
+    when written to a terminal other than TERM=dumb.
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    if os.environ.get("FORCE_COLOR", "0") not in ("", "0"):
+        return True
+    if os.environ.get("TERM") == "dumb":
+        return False
+
+    stream = stream or sys.stdout
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+_windows_console_ready = False
+
+
+def _enable_windows_console():
+    """
+    Turn on ANSI escape code processing in the Windows console, once color is turned on.
+    """
+    global _windows_console_ready
+    if _windows_console_ready or sys.platform != "win32":
+        return
+    _windows_console_ready = True
+
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+            kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def _plain(strings: Sequence, sep: str) -> str:
+    """
+    The text `_join` would produce, without any color codes.
+    """
+    if len(strings) == 1:
+        string = strings[0]
+        return string if type(string) is str else str(string)
+    if not strings:
+        return ""
+    return sep.join(map(str, strings)) + sep
+
+
+def _join(strings: Sequence, code: str, sep: str) -> str:
+    """
+    Prefix every string with `code`, and follow each with `sep` when there's more
+    than 1, in a single join.
+    """
+    if len(strings) == 1:
+        return code + str(strings[0])
+    if not strings:
+        return ""
+
+    # Every string is prefixed with `code`, so nested formatter calls work as intended
+    return code + (sep + code).join(map(str, strings)) + sep
+
+
+class Style:
+    """
+    A precompiled combination of color codes, e.g. `Style(ColorCodes.RED, bold=True)`.
+    Calling it formats `strings` in the same way as the `Formatter` methods.
+    """
+
+    def __init__(self, color: str = "", bold: bool = False, underline: bool = False):
+        self.code = (
+            color
+            + (ColorCodes.BOLD if bold else "")
+            + (ColorCodes.UNDERLINE if underline else "")
+        )
+        # Rendered labels, by text
+        self._labels: Dict[str, str] = {}
+
+    def __call__(self, *strings, sep: str = " ") -> ColoredText:
+        if not Formatter.color:
+            return _plain(strings, sep)
+        return ColoredText(self.code, _join(strings, self.code, sep))
+
+    def label(self, text: str) -> str:
+        """
+        Return `text` rendered in this style, rendering each distinct `text` only once.
+        Used for labels repeated throughout a run, like "PASS" and "FAIL".
+        """
+        if not Formatter.color:
+            return text
+
+        rendered = self._labels.get(text)
+        if rendered is None:
+            rendered = self._labels[text] = str(self(text))
+        return rendered
 
 
 class Formatter:
@@ -62,9 +228,19 @@ class Formatter:
     Class with methods for changing the color of text.
     """
 
-    # Required to make ANSI codes work on Windows
-    if platform == "win32":
-        system("color")
+    # Whether text is colored. When it isn't, every method returns plain strings
+    color: bool = False
+
+    @staticmethod
+    def set_color(enabled: Optional[bool] = None, stream: TextIO = None):
+        """
+        Turn color on or off, or decide with `supports_color` when `enabled` is None.
+        """
+        if enabled is None:
+            enabled = supports_color(stream)
+        if enabled:
+            _enable_windows_console()
+        Formatter.color = enabled
 
     @staticmethod
     def _concat(strings: Iterable[str], code: str = "", sep: str = " ") -> str:
@@ -72,80 +248,64 @@ class Formatter:
         Helper function for concatenating multiple arguments passed
         to any Formatter methods properly.
         """
-        if len(strings) == 1:
-            sep = ""
-
-        combined_strings = ""
-        for string in strings:
-
-            if not (hasattr(string, "__str__") or hasattr(string, "__repr__")):
-                raise TypeError(
-                    f"Value '{string}' of type '{type(string)}' doesn't have __str__ or __repr__ method."
-                )
-
-            string = str(string)
-
-            if isinstance(string, ColoredText):
-                combined_strings += string + sep
-            else:
-                # This is to ensure that nested formatter calls work as intended
-                combined_strings += code + string + sep
-
-        return combined_strings
+        return _join(strings, code, sep)
 
     @staticmethod
     def info(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Cyan colored string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.CYAN, sep)
-        return ColoredText(ColorCodes.CYAN, text)
+        return INFO(*strings, sep=sep)
 
     @staticmethod
     def success(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Green colored string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.GREEN, sep)
-        return ColoredText(ColorCodes.GREEN, text)
+        return SUCCESS(*strings, sep=sep)
 
     @staticmethod
     def warning(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Yellow colored string, separated by `sep`
         """
-
-        text = Formatter._concat(strings, ColorCodes.YELLOW, sep)
-        return ColoredText(ColorCodes.YELLOW, text)
+        return WARNING(*strings, sep=sep)
 
     @staticmethod
     def error(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Red colored string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.RED, sep)
-        return ColoredText(ColorCodes.RED, text)
+        return ERROR(*strings, sep=sep)
 
     @staticmethod
     def magenta(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Magenta colored string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.MAGENTA, sep)
-        return ColoredText(ColorCodes.MAGENTA, text)
+        return MAGENTA(*strings, sep=sep)
 
     @staticmethod
     def bold(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Bold string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.BOLD, sep)
-        return ColoredText(ColorCodes.BOLD, text)
+        return BOLD(*strings, sep=sep)
 
     @staticmethod
     def underline(*strings: str, sep=" ") -> str:
         """
         Return `strings` as 1 Underlined string, separated by `sep`
         """
-        text = Formatter._concat(strings, ColorCodes.UNDERLINE, sep)
-        return ColoredText(ColorCodes.UNDERLINE, text)
+        return UNDERLINE(*strings, sep=sep)
+
+
+INFO = Style(ColorCodes.CYAN)
+SUCCESS = Style(ColorCodes.GREEN)
+WARNING = Style(ColorCodes.YELLOW)
+ERROR = Style(ColorCodes.RED)
+MAGENTA = Style(ColorCodes.MAGENTA)
+BOLD = Style(bold=True)
+UNDERLINE = Style(underline=True)
+
+Formatter.set_color()
@@ -1 +1 @@
-from .core import generate_key
+from .core import generate_key, generate_key_batches, generate_keys
@@ -0,0 +1,203 @@
+import json
+import math
+from collections import Counter
+from string import ascii_letters, digits, hexdigits
+from time import perf_counter
+from typing import Dict, List
+
+from samutil.formatting import Formatter as f
+
+from .core import (
+    ALLOWED_CHARACTERS,
+    generate_key,
+    generate_key_batches,
+    random_characters,
+)
+
+ALPHABETS = {
+    "digits": digits,
+    "hex": hexdigits[:16],
+    "letters": ascii_letters,
+    "default": ALLOWED_CHARACTERS,
+}
+LENGTHS = [6, 16, 84]
+# A batch size of 1 measures `generate_key`, and 0 the default batch size
+BATCH_SIZES = [1, 64, 1024, 0]
+
+
+class Throughput:
+    """
+    How quickly keys of `length` characters from an alphabet were generated.
+    """
+
+    def __init__(
+        self, alphabet: str, length: int, batch_size: int, keys: int, seconds: float
+    ):
+        self.alphabet = alphabet
+        self.length = length
+        self.batch_size = batch_size
+        self.keys = keys
+        self.seconds = seconds
+
+    @property
+    def keys_per_second(self) -> float:
+        return self.keys / self.seconds
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.keys * self.length / self.seconds / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "alphabet": self.alphabet,
+            "length": self.length,
+            "batch_size": self.batch_size,
+            "keys": self.keys,
+            "seconds": self.seconds,
+            "keys_per_second": self.keys_per_second,
+            "megabytes_per_second": self.megabytes_per_second,
+        }
+
+
+class Uniformity:
+    """
+    The result of a chi-square test of whether every character of an alphabet was
+    generated equally often.
+    """
+
+    def __init__(
+        self, alphabet: str, samples: int, statistic: float, dof: int, p_value: float
+    ):
+        self.alphabet = alphabet
+        self.samples = samples
+        self.statistic = statistic
+        self.dof = dof
+        self.p_value = p_value
+
+    def passed(self, alpha: float) -> bool:
+        return self.p_value >= alpha
+
+    def to_dict(self) -> dict:
+        return {
+            "alphabet": self.alphabet,
+            "samples": self.samples,
+            "statistic": self.statistic,
+            "dof": self.dof,
+            "p_value": self.p_value,
+        }
+
+
+def _generate(amount: int, length: int, allowed_characters: str, batch_size: int):
+    if batch_size == 1:
+        for _ in range(amount):
+            generate_key(length, allowed_characters)
+    else:
+        for _ in generate_key_batches(
+            amount, length, allowed_characters, batch_size or None
+        ):
+            pass
+
+
+def measure_throughput(
+    alphabet: str, length: int, batch_size: int, min_time: float = 0.2
+) -> Throughput:
+    """
+    Generate keys, doubling the amount each round, until a round takes at least
+    `min_time`.
+    """
+    allowed_characters = ALPHABETS[alphabet]
+    amount = max(batch_size, 1)
+    while True:
+        start = perf_counter()
+        _generate(amount, length, allowed_characters, batch_size)
+        seconds = perf_counter() - start
+
+        if seconds >= min_time:
+            return Throughput(alphabet, length, batch_size, amount, seconds)
+        amount *= 2
+
+
+def chi_square_p_value(statistic: float, dof: int) -> float:
+    """
+    Approximate the probability of a chi-square statistic at least as large as
+    `statistic` with `dof` degrees of freedom, using the Wilson-Hilferty
+    transformation to a normal.
+    """
+    if dof <= 0:
+        return 1.0
+
+    scale = 2 / (9 * dof)
+    z = ((statistic / dof) ** (1 / 3) - (1 - scale)) / math.sqrt(scale)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def check_uniformity(alphabet: str, samples: int = 1_000_000) -> Uniformity:
+    """
+    Generate `samples` characters from an alphabet, and test how far the count of each
+    character is from an even share.
+    """
+    allowed_characters = ALPHABETS[alphabet]
+    counts = Counter(random_characters(samples, allowed_characters))
+    expected = samples / len(allowed_characters)
+    statistic = sum(
+        (counts[character] - expected) ** 2 / expected
+        for character in allowed_characters
+    )
+    dof = len(allowed_characters) - 1
+
+    return Uniformity(
+        alphabet, samples, statistic, dof, chi_square_p_value(statistic, dof)
+    )
+
+
+def output_throughput(results: List[Throughput]):
+    """
+    Print a table of how quickly keys were generated.
+    """
+    print(f.bold("\nThroughput"))
+    print(
+        f.bold(
+            f"  {'Alphabet':<10}  {'Length':>6}  {'Batch':>7}"
+            f"  {'Keys/sec':>14}  {'MB/sec':>8}"
+        )
+    )
+    for r in results:
+        batch = str(r.batch_size) if r.batch_size else "default"
+        print(
+            f"  {r.alphabet:<10}  {r.length:>6}  {batch:>7}"
+            f"  {r.keys_per_second:>14,.0f}  {r.megabytes_per_second:>8.2f}"
+        )
+
+
+def output_uniformity(results: List[Uniformity], alpha: float):
+    """
+    Print a table of the chi-square test of each alphabet.
+    """
+    print(f.bold("\nUniformity"), f.info(f"(chi-square, fails below p = {alpha:g})"))
+    print(
+        f.bold(
+            f"  {'Alphabet':<10}  {'Samples':>10}  {'Chi-square':>12}"
+            f"  {'DoF':>4}  {'p':>8}"
+        )
+    )
+    for r in results:
+        line = (
+            f"  {r.alphabet:<10}  {r.samples:>10}  {r.statistic:>12.2f}"
+            f"  {r.dof:>4}  {r.p_value:>8.4f}"
+        )
+        print(f.success(line) if r.passed(alpha) else f.error(line))
+
+
+def write_bench_report(
+    throughput: List[Throughput], uniformity: List[Uniformity], filename: str
+):
+    """
+    Write the results of a benchmark run to `filename` as JSON, to compare across
+    releases.
+    """
+    report: Dict[str, list] = {
+        "throughput": [r.to_dict() for r in throughput],
+        "uniformity": [r.to_dict() for r in uniformity],
+    }
+    with open(filename, "w") as o:
+        json.dump(report, o, indent=2)
@@ -1,10 +1,59 @@
+from functools import lru_cache
+from os import urandom
 from secrets import choice
 from string import ascii_letters, digits, punctuation
+from typing import Iterator, List, Tuple
 
 KEY_LENGTH = 84
 punctuation = punctuation.replace('"', "").replace("'", "")
 ALLOWED_CHARACTERS = ascii_letters + digits + punctuation
 
+# Number of characters drawn from the OS at a time when generating keys in bulk
+BATCH_CHARACTERS = 1 << 16
+
+
+@lru_cache(maxsize=32)
+def _translation(allowed_characters: str) -> Tuple[bytes, bytes]:
+    """
+    Build a table mapping random bytes to `allowed_characters`, and the set of bytes
+    to reject. Only bytes below the largest multiple of the alphabet size are kept,
+    so every character is equally likely.
+    """
+    size = len(allowed_characters)
+    limit = 256 - 256 % size
+    table = bytes(
+        ord(allowed_characters[byte % size]) if byte < limit else 0
+        for byte in range(256)
+    )
+    return table, bytes(range(limit, 256))
+
+
+def random_characters(count: int, allowed_characters: str = ALLOWED_CHARACTERS) -> str:
+    """
+    Draw `count` characters uniformly at random from `allowed_characters`.
+    """
+    size = len(allowed_characters)
+    if size == 0:
+        raise ValueError("allowed_characters must not be empty")
+
+    if not (allowed_characters.isascii() and size <= 256):
+        # Characters can't be mapped from single bytes, so draw them one at a time
+        return "".join(choice(allowed_characters) for _ in range(count))
+
+    table, rejected = _translation(allowed_characters)
+    # Draw slightly more than needed on average, so a second draw is rarely required
+    ratio = 256 / (256 - len(rejected))
+
+    chunks = []
+    drawn = 0
+    while drawn < count:
+        block = urandom(int((count - drawn) * ratio) + 16)
+        chunk = block.translate(table, rejected)
+        chunks.append(chunk)
+        drawn += len(chunk)
+
+    return b"".join(chunks)[:count].decode("ascii")
+
 
 def generate_key(
     length: int = KEY_LENGTH, allowed_characters: str = ALLOWED_CHARACTERS
@@ -12,9 +61,41 @@ def generate_key(
     """
     Generate a key using a given `length` from the set of charcters `allowed_characters`
     """
-    key = ""
-    for _ in range(length):
-        key += choice(allowed_characters)
+    key = random_characters(length, allowed_characters)
 
     assert len(key) == length
     return key
+
+
+def generate_key_batches(
+    amount: int,
+    length: int = KEY_LENGTH,
+    allowed_characters: str = ALLOWED_CHARACTERS,
+    batch_size: int = None,
+) -> Iterator[List[str]]:
+    """
+    Generate `amount` keys in lists of up to `batch_size` keys, drawing the characters
+    for each batch at once. By default, a batch holds about `BATCH_CHARACTERS`
+    characters.
+    """
+    if batch_size is None:
+        batch_size = max(BATCH_CHARACTERS // max(length, 1), 1)
+
+    remaining = amount
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        characters = random_characters(count * length, allowed_characters)
+        yield [characters[i : i + length] for i in range(0, count * length, length)]
+        remaining -= count
+
+
+def generate_keys(
+    amount: int,
+    length: int = KEY_LENGTH,
+    allowed_characters: str = ALLOWED_CHARACTERS,
+) -> Iterator[str]:
+    """
+    Generate `amount` keys lazily, in the same way as `generate_key_batches`.
+    """
+    for batch in generate_key_batches(amount, length, allowed_characters):
+        yield from batch
@@ -0,0 +1,163 @@
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from typing import BinaryIO, Iterator, List
+
+# Magic bytes, source size, source mtime in nanoseconds and number of hashes
+HEADER = struct.Struct("<8sQQQ")
+MAGIC = b"SAMKIDX" + sys.byteorder[0].encode()
+
+# Number of hashes sorted in memory at once while building an index
+RUN_SIZE = 1 << 20
+
+# Number of hashes read or written at a time while merging runs
+CHUNK_SIZE = 1 << 16
+
+
+def key_hash(key: bytes) -> int:
+    """
+    Hash a key to the 64 bit integer stored for it in a `KeyIndex`.
+    """
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+def index_path(filename: str) -> str:
+    return filename + ".idx"
+
+
+def _read_keys(filename: str) -> Iterator[bytes]:
+    with open(filename, "rb") as o:
+        for line in o:
+            key = line.rstrip(b"\r\n")
+            if key:
+                yield key
+
+
+def _read_run(run: BinaryIO) -> Iterator[int]:
+    run.seek(0)
+    while True:
+        chunk = array("Q")
+        chunk.frombytes(run.read(8 * CHUNK_SIZE))
+        if not chunk:
+            return
+        yield from chunk
+
+
+def _write_run(hashes: List[int]) -> BinaryIO:
+    run = tempfile.TemporaryFile()
+    hashes.sort()
+    array("Q", hashes).tofile(run)
+    return run
+
+
+def build_index(filename: str, path: str = None):
+    """
+    Write the sorted hashes of every key in `filename`, which holds 1 key per line,
+    to `path`. Hashes are sorted in runs of `RUN_SIZE` which are merged on disk, so
+    memory use stays flat however large the file is.
+    """
+    path = path or index_path(filename)
+    stat = os.stat(filename)
+
+    runs = []
+    hashes = []
+    try:
+        for key in _read_keys(filename):
+            hashes.append(key_hash(key))
+            if len(hashes) == RUN_SIZE:
+                runs.append(_write_run(hashes))
+                hashes = []
+        if hashes:
+            runs.append(_write_run(hashes))
+        del hashes
+
+        temporary = path + ".tmp"
+        count = 0
+        with open(temporary, "wb") as o:
+            o.write(HEADER.pack(MAGIC, 0, 0, 0))
+            merged = heapq.merge(*(_read_run(run) for run in runs))
+            chunk = array("Q")
+            for value in merged:
+                chunk.append(value)
+                if len(chunk) == CHUNK_SIZE:
+                    chunk.tofile(o)
+                    count += len(chunk)
+                    chunk = array("Q")
+            chunk.tofile(o)
+            count += len(chunk)
+
+            # Only mark the index as complete once every hash is written
+            o.seek(0)
+            o.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, count))
+    finally:
+        for run in runs:
+            run.close()
+
+    os.replace(temporary, path)
+
+
+class KeyIndex:
+    """
+    A memory mapped, sorted index of the hashes of every key in a keys file, used to
+    check whether a key already exists without loading the file. The index is built
+    next to the file the first time, and rebuilt whenever the file changes.
+    A hash collision can make a new key look like it exists, but an existing key
+    is never missed.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.path = index_path(filename)
+        if not self.is_current():
+            build_index(filename, self.path)
+
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._hashes = self._view[HEADER.size :].cast("Q")
+
+    def is_current(self) -> bool:
+        """
+        Check whether the index on disk was built from the current contents of the
+        keys file.
+        """
+        try:
+            with open(self.path, "rb") as o:
+                magic, size, mtime, count = HEADER.unpack(o.read(HEADER.size))
+            index_size = os.path.getsize(self.path)
+        except (OSError, struct.error):
+            return False
+
+        stat = os.stat(self.filename)
+        return (
+            magic == MAGIC
+            and size == stat.st_size
+            and mtime == stat.st_mtime_ns
+            and index_size == HEADER.size + 8 * count
+        )
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, key: str) -> bool:
+        value = key_hash(key.encode())
+        i = bisect_left(self._hashes, value)
+        return i < len(self._hashes) and self._hashes[i] == value
+
+    def close(self):
+        self._hashes.release()
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
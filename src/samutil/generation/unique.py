@@ -0,0 +1,225 @@
+import math
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from hashlib import blake2b
+from random import Random
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .core import ALLOWED_CHARACTERS, BATCH_CHARACTERS, KEY_LENGTH, generate_key_batches
+from .index import KeyIndex
+
+# Runs generating up to this many keys remember them exactly, as a set is small enough
+EXACT_LIMIT = 1 << 20
+
+# Number of precomputed bit patterns a key's bits in a BloomFilter are chosen from
+PATTERNS = 1 << 16
+
+
+@lru_cache(maxsize=8)
+def _patterns(hashes: int) -> Tuple[int, ...]:
+    """
+    Precompute masks of up to `hashes` bits, so an item's mask is a single lookup.
+    They're seeded, so every process builds the same patterns.
+    """
+    rng = Random(hashes)
+    return tuple(
+        sum(1 << bit for bit in set(rng.getrandbits(6) for _ in range(hashes)))
+        for _ in range(PATTERNS)
+    )
+
+
+def fingerprint(item: str, words: int, hashes: int) -> Tuple[int, int]:
+    """
+    Hash `item` to the index of a word in a `BloomFilter` with `words` words,
+    and a mask of up to `hashes` bits to set in that word.
+    """
+    digest = blake2b(item.encode(), digest_size=10).digest()
+    pattern = _patterns(hashes)[int.from_bytes(digest[8:], "little")]
+    return int.from_bytes(digest[:8], "little") % words, pattern
+
+
+class BloomFilter:
+    """
+    A fixed size set of strings which may report false positives, but never false
+    negatives. Sized to hold `capacity` items with a false positive rate of around
+    `error_rate`. Every bit for an item falls in a single 64 bit word, so adding an
+    item only touches 1 word, and the hashing can be done by `fingerprint` elsewhere.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        # Packing an item's bits into 1 word raises the false positive rate, so use
+        # twice the bits an unblocked filter would need
+        self.words = max(int(bits) * 2 // 64, 1)
+        self.hashes = min(max(round(bits / capacity * math.log(2)), 1), 8)
+        self._words = array("Q", bytes(8 * self.words))
+
+    def add_fingerprint(self, word: int, mask: int) -> bool:
+        """
+        Add an item hashed by `fingerprint`, returning False if it may already have
+        been added.
+        """
+        current = self._words[word]
+        if current & mask == mask:
+            return False
+        self._words[word] = current | mask
+        return True
+
+    def add(self, item: str) -> bool:
+        """
+        Add `item`, returning False if it may already have been added.
+        """
+        return self.add_fingerprint(*fingerprint(item, self.words, self.hashes))
+
+
+class ExactSet:
+    """
+    The same interface as `BloomFilter`, backed by a set, for runs small enough to
+    store.
+    """
+
+    def __init__(self):
+        self._items: Set[str] = set()
+
+    def add(self, item: str) -> bool:
+        if item in self._items:
+            return False
+        self._items.add(item)
+        return True
+
+
+def key_space(length: int, allowed_characters: str = ALLOWED_CHARACTERS) -> int:
+    """
+    Return the number of distinct keys of `length` characters from `allowed_characters`.
+    """
+    return len(set(allowed_characters)) ** length
+
+
+def check_key_space(
+    amount: int,
+    length: int = KEY_LENGTH,
+    allowed_characters: str = ALLOWED_CHARACTERS,
+    existing: KeyIndex = None,
+) -> int:
+    """
+    Raise a ValueError if there aren't `amount` unused keys of `length` characters,
+    otherwise return how many there are.
+    """
+    space = key_space(length, allowed_characters)
+    if existing is not None:
+        space -= len(existing)
+    if amount > space:
+        raise ValueError(
+            f"Can't generate {amount} unique keys of length {length}, "
+            f"only {max(space, 0)} are unused"
+        )
+    return space
+
+
+def _generate_batch(
+    count: int, length: int, allowed_characters: str, shape: Optional[Tuple[int, int]]
+) -> Tuple[List[str], Optional[List[Tuple[int, int]]]]:
+    keys = next(
+        generate_key_batches(count, length, allowed_characters, batch_size=count)
+    )
+    if shape is None:
+        return keys, None
+    return keys, [fingerprint(key, *shape) for key in keys]
+
+
+def _generate(
+    amount: int,
+    length: int,
+    allowed_characters: str,
+    workers: int,
+    shape: Optional[Tuple[int, int]] = None,
+) -> Iterator[Tuple[List[str], Optional[List[Tuple[int, int]]]]]:
+    """
+    Generate `amount` keys in batches on a pool of `workers` processes. If `shape` is
+    given as the words and hashes of a `BloomFilter`, each batch comes with the
+    fingerprint of every key, so the hashing is spread across the workers too.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    batch_size = max(BATCH_CHARACTERS // max(length, 1), 1)
+    counts = [batch_size] * (amount // batch_size)
+    if amount % batch_size:
+        counts.append(amount % batch_size)
+
+    if workers <= 1:
+        for count in counts:
+            yield _generate_batch(count, length, allowed_characters, shape)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a few batches per worker in flight, so memory use doesn't grow with
+        # `amount`
+        pending = deque()
+        for count in counts:
+            pending.append(
+                pool.submit(_generate_batch, count, length, allowed_characters, shape)
+            )
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parallel_key_batches(
+    amount: int,
+    length: int = KEY_LENGTH,
+    allowed_characters: str = ALLOWED_CHARACTERS,
+    workers: int = 1,
+) -> Iterator[List[str]]:
+    """
+    Generate `amount` keys in batches, on a pool of `workers` processes.
+    A `workers` value of 0 uses every available core.
+    """
+    for keys, _ in _generate(amount, length, allowed_characters, workers):
+        yield keys
+
+
+def unique_key_batches(
+    amount: int,
+    length: int = KEY_LENGTH,
+    allowed_characters: str = ALLOWED_CHARACTERS,
+    workers: int = 1,
+    existing: KeyIndex = None,
+) -> Iterator[List[str]]:
+    """
+    Generate `amount` keys in batches, none of which repeat, or are in the `existing`
+    index. Large runs are deduplicated with a `BloomFilter`, so a small fraction of
+    fresh keys are discarded and replaced, but a repeated key is never yielded.
+    """
+    space = check_key_space(amount, length, allowed_characters, existing)
+
+    # Near a full key space, false positives would make the last keys hard to find
+    if amount <= EXACT_LIMIT or amount > space // 2:
+        seen, shape = ExactSet(), None
+    else:
+        seen = BloomFilter(amount)
+        shape = (seen.words, seen.hashes)
+
+    remaining = amount
+    while remaining > 0:
+        for keys, prints in _generate(
+            remaining, length, allowed_characters, workers, shape
+        ):
+            if prints is None:
+                fresh = [key for key in keys if seen.add(key)]
+            else:
+                add = seen.add_fingerprint
+                fresh = [
+                    key for key, (word, mask) in zip(keys, prints) if add(word, mask)
+                ]
+
+            if existing is not None:
+                fresh = [key for key in fresh if key not in existing]
+            remaining -= len(fresh)
+            if fresh:
+                yield fresh
@@ -0,0 +1,123 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, List
+
+KEY_FORMATS = ["text", "csv", "jsonl", "binary"]
+
+
+class KeyWriter:
+    """
+    Writes batches of keys to a binary stream as they are generated, so memory use
+    doesn't depend on how many keys are written in total.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.count = 0
+
+    def start(self):
+        pass
+
+    def encode(self, keys: List[str]) -> bytes:
+        raise NotImplementedError
+
+    def write(self, keys: List[str]):
+        if not keys:
+            return
+        self.stream.write(self.encode(keys))
+        self.count += len(keys)
+
+    def write_all(self, batches: Iterable[List[str]]):
+        self.start()
+        for keys in batches:
+            self.write(keys)
+
+
+class TextWriter(KeyWriter):
+    """
+    1 key per line, without a newline after the last key.
+    """
+
+    def encode(self, keys: List[str]) -> bytes:
+        text = "\n".join(keys)
+        return (("\n" + text) if self.count else text).encode()
+
+
+class CsvWriter(KeyWriter):
+    """
+    An `index,key` header, then 1 row per key, numbered from 0.
+    """
+
+    def start(self):
+        self.stream.write(b"index,key\r\n")
+
+    def encode(self, keys: List[str]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(enumerate(keys, self.count))
+        return buffer.getvalue().encode()
+
+
+class JsonLinesWriter(KeyWriter):
+    """
+    1 JSON object per line, with the key and its index.
+    """
+
+    def encode(self, keys: List[str]) -> bytes:
+        return "".join(
+            json.dumps({"index": index, "key": key}) + "\n"
+            for index, key in enumerate(keys, self.count)
+        ).encode()
+
+
+class BinaryWriter(KeyWriter):
+    """
+    Every key's ASCII bytes, back to back with no separators. Every key has the same
+    length, so the nth key of length `l` starts at byte `n * l`.
+    """
+
+    def encode(self, keys: List[str]) -> bytes:
+        return "".join(keys).encode("ascii")
+
+
+WRITERS = {
+    "text": TextWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "binary": BinaryWriter,
+}
+
+
+@contextmanager
+def open_output(out: str, compress: bool = False) -> Iterator[BinaryIO]:
+    """
+    Open `out` for writing keys to, where '-' is stdout, optionally gzip compressing
+    them.
+    """
+    if out != "-":
+        with (gzip.open if compress else open)(out, "wb") as o:
+            yield o
+        return
+
+    # Write straight to stdout's buffer, leaving stdout open afterwards
+    sys.stdout.flush()
+    if compress:
+        with gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb") as o:
+            yield o
+    else:
+        yield sys.stdout.buffer
+    sys.stdout.buffer.flush()
+
+
+def create_writer(stream: BinaryIO, format: str = "text") -> KeyWriter:
+    """
+    Create a writer for keys in one of `KEY_FORMATS`.
+    """
+    if format not in WRITERS:
+        raise ValueError(
+            f"Unknown key format '{format}', expected one of {KEY_FORMATS}"
+        )
+    return WRITERS[format](stream)
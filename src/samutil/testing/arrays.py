@@ -0,0 +1,163 @@
+import math
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .diff import Difference
+
+# Relative and absolute tolerances, or None for exact equality
+Tolerance = Optional[Tuple[float, float]]
+
+_numpy = None
+
+
+def numpy():
+    """
+    Import NumPy the first time it's needed, returning None if it isn't installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def unravel(index: int, shape: Tuple[int, ...]) -> Tuple[int, ...]:
+    """
+    Convert an index into a flattened array into an index into each dimension of
+    `shape`.
+    """
+    position = []
+    for size in reversed(shape):
+        index, remainder = divmod(index, size)
+        position.append(remainder)
+    return tuple(reversed(position))
+
+
+def flatten(value: Any) -> Tuple[Tuple[int, ...], Sequence]:
+    """
+    Return the shape of an array-like `value`, and its items in a flat sequence.
+    Buffers such as `array.array` and `memoryview` are read without copying where
+    possible.
+    """
+    if isinstance(value, (list, tuple)):
+        shape = []
+        level = value
+        while isinstance(level, (list, tuple)):
+            shape.append(len(level))
+            if not level:
+                break
+            level = level[0]
+
+        flat = list(value)
+        for _ in shape[1:]:
+            if not all(isinstance(item, (list, tuple)) for item in flat):
+                # Ragged, so compare the top level items directly
+                return (len(value),), list(value)
+            flat = [item for items in flat for item in items]
+
+        if len(flat) != math.prod(shape):
+            return (len(value),), list(value)
+        return tuple(shape), flat
+
+    view = memoryview(value)
+    if view.ndim <= 1:
+        return view.shape, view
+    if view.c_contiguous:
+        return view.shape, view.cast("B").cast(view.format)
+    return view.shape, flatten(view.tolist())[1]
+
+
+def _matches(received: Any, expected: Any, tolerance: Tolerance) -> bool:
+    if tolerance is None:
+        return received == expected
+
+    rel, abs_ = tolerance
+    try:
+        return abs(received - expected) <= abs_ + rel * abs(expected)
+    except TypeError:
+        return received == expected
+
+
+def _compare_numpy(
+    np, received: Any, expected: Any, tolerance: Tolerance, limit: int
+) -> Tuple[List[Difference], int]:
+    received = np.asarray(received)
+    expected = np.asarray(expected)
+    if received.shape != expected.shape:
+        return [Difference((), "shape", received.shape, expected.shape)], 1
+
+    if tolerance is None:
+        matches = received == expected
+    else:
+        matches = np.isclose(received, expected, rtol=tolerance[0], atol=tolerance[1])
+
+    mismatched = np.flatnonzero(~np.asarray(matches, dtype=bool))
+    differences = []
+    for index in mismatched[:limit]:
+        position = np.unravel_index(int(index), received.shape)
+        position = tuple(int(i) for i in position)
+        differences.append(
+            Difference(
+                position,
+                "changed",
+                received[position].item(),
+                expected[position].item(),
+            )
+        )
+    return differences, int(mismatched.size)
+
+
+def _compare_buffers(
+    received: Any, expected: Any, tolerance: Tolerance, limit: int
+) -> Tuple[List[Difference], int]:
+    received_shape, received_items = flatten(received)
+    expected_shape, expected_items = flatten(expected)
+    if received_shape != expected_shape:
+        return [Difference((), "shape", received_shape, expected_shape)], 1
+
+    # Buffers of the same type are compared element by element in C
+    if (
+        tolerance is None
+        and isinstance(received_items, memoryview)
+        and isinstance(expected_items, memoryview)
+        and received_items == expected_items
+    ):
+        return [], 0
+
+    differences = []
+    count = 0
+    for index, (r, e) in enumerate(zip(received_items, expected_items)):
+        if not _matches(r, e, tolerance):
+            count += 1
+            if len(differences) < limit:
+                differences.append(
+                    Difference(unravel(index, received_shape), "changed", r, e)
+                )
+    return differences, count
+
+
+def compare_arrays(
+    received: Any, expected: Any, tolerance: Tolerance = None, limit: int = 10
+) -> Tuple[List[Difference], int]:
+    """
+    Compare 2 arrays element by element, exactly or within `tolerance`. Returns the
+    first `limit` mismatched elements, and how many elements mismatched in total.
+    NumPy is used when it's installed, otherwise arrays are read as buffers or lists.
+    """
+    np = numpy()
+    if np is not None:
+        try:
+            return _compare_numpy(np, received, expected, tolerance, limit)
+        except (TypeError, ValueError):
+            # e.g. ragged lists or values NumPy can't subtract, which are compared one
+            # by one
+            pass
+
+    try:
+        return _compare_buffers(received, expected, tolerance, limit)
+    except TypeError:
+        # Not an array at all
+        return [Difference((), "changed", received, expected)], 1
@@ -0,0 +1,158 @@
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .reporters import format_time, truncate
+from .results import CaseResult, FileResult
+
+
+class Regression:
+    """
+    The change in median time of a case between a baseline and the current run.
+    """
+
+    def __init__(self, key: str, case: CaseResult, baseline: float, current: float):
+        self.key = key
+        self.case = case
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def change(self) -> float:
+        """
+        Relative change in median time, e.g. 0.25 for 25% slower.
+        """
+        return self.current / self.baseline - 1
+
+    @property
+    def name(self) -> str:
+        return f"{self.key} {self.case.name}"
+
+
+def parse_percentage(value: str) -> float:
+    """
+    Parse a percentage such as '10%' or '10' into a fraction (0.1).
+    """
+    try:
+        return float(str(value).strip().rstrip("%")) / 100
+    except ValueError:
+        raise ValueError(f"Invalid percentage '{value}', expected a value like '10%'")
+
+
+def format_percentage(fraction: float) -> str:
+    """
+    Format a fraction as a percentage without rounding it, e.g. '12.5%' for 0.125.
+    """
+    return f"{fraction * 100:g}%"
+
+
+def benchmarked_cases(files: List[FileResult]) -> Iterator[Tuple[str, CaseResult]]:
+    """
+    Yield every benchmarked case that ran successfully, with a key made from its file,
+    suite and position in the suite. Arguments aren't part of the key, as their repr may
+    change between runs, e.g. if it includes a memory address. Other cases are skipped,
+    as a single execution time is too noisy to compare.
+    """
+    for file in files:
+        filename = os.path.normpath(file.filename)
+        seen: Dict[str, int] = {}
+        for suite in file.suites:
+            # Suites sharing a name are told apart by how many came before them
+            count = seen.get(suite.name, 0)
+            seen[suite.name] = count + 1
+            suite_name = f"{suite.name}[{count}]" if count else suite.name
+
+            for index, case in enumerate(suite.cases):
+                if case.stats and case.exception is None:
+                    yield f"{filename}::{suite_name}::{index}", case
+
+
+def case_timings(files: List[FileResult]) -> Dict[str, dict]:
+    """
+    Collect the timing stats of every benchmarked case, keyed by file, suite and case.
+    """
+    return {key: case.stats for key, case in benchmarked_cases(files)}
+
+
+def save_baseline(files: List[FileResult], filename: str):
+    """
+    Write per-case timing stats of a test run to `filename`, for use with
+    `compare_baseline`.
+    """
+    with open(filename, "w") as o:
+        json.dump({"cases": case_timings(files)}, o, indent=2, sort_keys=True)
+
+
+def load_baseline(filename: str) -> Dict[str, dict]:
+    with open(filename) as o:
+        return json.load(o)["cases"]
+
+
+def compare_baseline(
+    files: List[FileResult], baseline: Dict[str, dict], max_regression: float
+) -> List[Regression]:
+    """
+    Compare the median time of every benchmarked case against `baseline`. Cases
+    that slowed down by more than `max_regression` (a fraction, e.g. 0.1) are marked
+    as failed. Returns every compared case, sorted from the biggest regression to the
+    smallest.
+    """
+    regressions = []
+    for key, case in benchmarked_cases(files):
+        if key not in baseline:
+            continue
+
+        before = baseline[key]["median"]
+        if before <= 0:
+            continue
+
+        regression = Regression(key, case, before, case.stats["median"])
+        if regression.change > max_regression:
+            case.passed = False
+            case.regression = regression.change
+
+        regressions.append(regression)
+
+    return sorted(regressions, key=lambda r: r.change, reverse=True)
+
+
+def output_regressions(
+    regressions: List[Regression], max_regression: float, limit: int = 10
+):
+    """
+    Print a table of the cases which slowed down the most since the baseline.
+    """
+    failed = [r for r in regressions if r.change > max_regression]
+    threshold = format_percentage(max_regression)
+
+    print(f.bold("\nBaseline comparison"), f.info(f"(max regression {threshold})"))
+    if not regressions:
+        print(f.warning("  No cases matched the baseline.\n"))
+        return
+
+    rows = regressions[: max(limit, len(failed))]
+    width = max(len(truncate(r.name)) for r in rows)
+
+    print(
+        f.bold(f"  {'Case':<{width}}  {'Baseline':>20}  {'Current':>20}  {'Change':>8}")
+    )
+    for r in rows:
+        name = truncate(r.name)
+        before = "%s %s" % format_time(r.baseline)
+        now = "%s %s" % format_time(r.current)
+        line = f"  {name:<{width}}  {before:>20}  {now:>20}  {r.change:>+8.1%}"
+        if r.change > max_regression:
+            print(f.error(line))
+        elif r.change > 0:
+            print(f.warning(line))
+        else:
+            print(f.success(line))
+
+    if failed:
+        print(
+            f.error(f"\n  {len(failed)} case(s) regressed by more than {threshold}\n")
+        )
+    else:
+        print(f.success(f"\n  No case regressed by more than {threshold}\n"))
@@ -0,0 +1,116 @@
+import math
+import statistics
+from itertools import repeat
+from time import perf_counter
+from typing import Callable, List
+
+
+class BenchmarkStats:
+    """
+    Per-call timings collected by a `Benchmark`, in seconds.
+    """
+
+    def __init__(self, times: List[float], loops: int):
+        self.times = sorted(times)
+        self.loops = loops
+        self.rounds = len(times)
+
+    @property
+    def min(self) -> float:
+        return self.times[0]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.times)
+
+    @property
+    def p95(self) -> float:
+        index = max(math.ceil(0.95 * self.rounds) - 1, 0)
+        return self.times[index]
+
+    @property
+    def stddev(self) -> float:
+        if self.rounds < 2:
+            return 0.0
+        return statistics.stdev(self.times)
+
+    @property
+    def ops(self) -> float:
+        """
+        Calls per second, based on the median time.
+        """
+        if self.median == 0:
+            return math.inf
+        return 1 / self.median
+
+    def to_dict(self) -> dict:
+        return {
+            "min": self.min,
+            "median": self.median,
+            "mean": self.mean,
+            "p95": self.p95,
+            "stddev": self.stddev,
+            "ops": self.ops,
+            "rounds": self.rounds,
+            "loops": self.loops,
+        }
+
+
+class Benchmark:
+    """
+    Time a callable over several rounds, each of which calls it `loops` times.
+    The number of loops is calibrated so that a round takes at least `min_time` seconds,
+    which keeps timer resolution from dominating sub-microsecond functions.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 10,
+        warmup: int = 1,
+        min_time: float = 0.02,
+        max_loops: int = 10_000_000,
+    ):
+        if rounds < 1:
+            raise ValueError("Benchmark must run at least 1 round")
+
+        self.rounds = rounds
+        self.warmup = warmup
+        self.min_time = min_time
+        self.max_loops = max_loops
+
+    @staticmethod
+    def _time(func: Callable, loops: int) -> float:
+        iterator = repeat(None, loops)
+        t1 = perf_counter()
+        for _ in iterator:
+            func()
+        t2 = perf_counter()
+        return t2 - t1
+
+    def calibrate(self, func: Callable) -> int:
+        """
+        Find the number of loops needed for a round to take at least `min_time`,
+        trying 1, 2, 5, 10, 20, 50... loops in the same way as `timeit`.
+        """
+        multiplier = 1
+        while True:
+            for step in (1, 2, 5):
+                loops = step * multiplier
+                if loops >= self.max_loops:
+                    return self.max_loops
+                if self._time(func, loops) >= self.min_time:
+                    return loops
+            multiplier *= 10
+
+    def run(self, func: Callable) -> BenchmarkStats:
+        loops = self.calibrate(func)
+
+        for _ in range(self.warmup):
+            self._time(func, loops)
+
+        times = [self._time(func, loops) / loops for _ in range(self.rounds)]
+        return BenchmarkStats(times, loops)
@@ -0,0 +1,180 @@
+import ast
+import hashlib
+import json
+import os
+from typing import Dict, List, Set
+
+from .results import FileResult
+
+CACHE_DIR = ".samutil_cache"
+
+
+def ensure_cache_dir(directory: str = CACHE_DIR):
+    """
+    Create the cache directory, keeping it out of version control without
+    touching the project's .gitignore.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    ignore = os.path.join(directory, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w") as o:
+            o.write("*\n")
+
+
+def module_paths(root: str, module: str) -> List[str]:
+    """
+    Return the possible paths of a module named `module` relative to `root`.
+    """
+    base = os.path.join(root, *module.split("."))
+    return [base + ".py", os.path.join(base, "__init__.py")]
+
+
+def resolve_imports(filename: str, source: bytes) -> List[str]:
+    """
+    Find the local files imported by `source`, which was read from `filename`.
+    Absolute imports are resolved relative to the file's directory and the current
+    working directory. Anything that can't be found there (the standard library,
+    installed packages) is ignored.
+    """
+    try:
+        tree = ast.parse(source, filename)
+    except (SyntaxError, ValueError):
+        return []
+
+    dirname = os.path.dirname(os.path.abspath(filename))
+    roots = [dirname, os.getcwd()]
+    candidates = []
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                for root in roots:
+                    candidates.extend(module_paths(root, alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > 0:
+                root = dirname
+                for _ in range(node.level - 1):
+                    root = os.path.dirname(root)
+                bases = [root]
+            else:
+                bases = roots
+
+            for base in bases:
+                module = node.module or ""
+                if module:
+                    candidates.extend(module_paths(base, module))
+                # 'from package import module' may import a submodule
+                for alias in node.names:
+                    name = f"{module}.{alias.name}" if module else alias.name
+                    candidates.extend(module_paths(base, name))
+
+    imports = []
+    for candidate in candidates:
+        candidate = os.path.normpath(candidate)
+        if candidate not in imports and os.path.isfile(candidate):
+            imports.append(candidate)
+    return imports
+
+
+class TestCache:
+    """
+    Stores the content hash of every test file, and the local modules it imports,
+    as of the last run in which all of its tests passed.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "hashes.json")
+        self._sources: Dict[str, bytes] = {}
+        self._hashes: Dict[str, str] = {}
+        self._imports: Dict[str, List[str]] = {}
+
+        try:
+            with open(self.path) as o:
+                self.green: Dict[str, str] = json.load(o)
+        except (OSError, ValueError):
+            self.green = {}
+
+    def _source(self, filename: str) -> bytes:
+        if filename not in self._sources:
+            try:
+                with open(filename, "rb") as o:
+                    self._sources[filename] = o.read()
+            except FileNotFoundError:
+                # Deleted since it was found, so it has no content
+                self._sources[filename] = b""
+        return self._sources[filename]
+
+    def forget(self, filenames: Set[str]):
+        """
+        Drop the cached contents of `filenames`, after they have changed on disk.
+        """
+        for filename in filenames:
+            self._sources.pop(filename, None)
+            self._hashes.pop(filename, None)
+        # A change can add or remove a module, which changes how other imports resolve
+        self._imports.clear()
+
+    def content_hash(self, filename: str) -> str:
+        if filename not in self._hashes:
+            self._hashes[filename] = hashlib.sha256(self._source(filename)).hexdigest()
+        return self._hashes[filename]
+
+    def imports(self, filename: str) -> List[str]:
+        if filename not in self._imports:
+            self._imports[filename] = resolve_imports(filename, self._source(filename))
+        return self._imports[filename]
+
+    def inputs(self, filename: str) -> Set[str]:
+        """
+        Return `filename` and every local module it imports, directly or indirectly.
+        """
+        filename = os.path.normpath(os.path.abspath(filename))
+        seen = {filename}
+        pending = [filename]
+        while pending:
+            for imported in self.imports(pending.pop()):
+                if imported not in seen:
+                    seen.add(imported)
+                    pending.append(imported)
+        return seen
+
+    def digest(self, filename: str) -> str:
+        """
+        Hash the contents of `filename` and all of its local imports.
+        """
+        digest = hashlib.sha256()
+        for path in sorted(self.inputs(filename)):
+            digest.update(path.encode())
+            digest.update(self.content_hash(path).encode())
+        return digest.hexdigest()
+
+    def changed(self, filenames: List[str]) -> List[str]:
+        """
+        Filter `filenames` down to those whose inputs changed since their last green
+        run.
+        """
+        return [
+            filename
+            for filename in filenames
+            if self.green.get(os.path.normpath(filename)) != self.digest(filename)
+        ]
+
+    def update(self, files: List[FileResult]):
+        """
+        Record the digest of every file that passed, and forget any that failed.
+        Files which raised an error or ran no suites, e.g. because they couldn't be
+        imported, aren't green, so they're run again next time.
+        """
+        for file in files:
+            key = os.path.normpath(file.filename)
+            if file.passed and file.suites:
+                self.green[key] = self.digest(file.filename)
+            else:
+                self.green.pop(key, None)
+
+    def save(self):
+        ensure_cache_dir(self.directory)
+        with open(self.path, "w") as o:
+            json.dump(self.green, o, indent=2, sort_keys=True)
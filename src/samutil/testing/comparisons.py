@@ -1,17 +1,62 @@
+import asyncio
+import cmath
+import cProfile
+import inspect
+from contextlib import contextmanager
 from time import perf_counter
+from typing import List, Optional, Tuple
 
 from samutil.formatting import Formatter as f
-from sigfig import round
 
+from .arrays import compare_arrays
+from .benchmark import Benchmark
+from .diff import DIFF_LIMIT, Difference, diff, short_repr
+from .fixtures import Teardowns, setup_fixtures, teardown, uses_fixtures
+from .memory import MemoryTracker, MemoryUsage
+from .profiling import add_profile, case_stats
+from .reporters import format_args, get_reporter
+from .results import CaseResult, collector
+from .settings import Settings
+from .timeouts import CaseTimeout, call_with_timeout, case_limit
 from .types import TestSubject, Value
-from .utils import call_if_callable, output_case_args
+from .utils import (
+    bind_args,
+    bind_subject,
+    call_if_callable,
+    call_subject,
+    output_case_args,
+    run_coroutine,
+)
+
+# Cases waiting to be run by `concurrently`
+_pending: Optional[List[Tuple["ComparisonRunner", "BaseComparison"]]] = None
 
 
 class BaseComparison:
     result = None
+    exception = None
     time_taken = 0
+    # Time spent setting up the fixtures used by the case, which isn't part of
+    # `time_taken`
+    setup_time = 0
     same_type = True
     passed = False
+    # Where the result differs from the expected value, set by comparisons which diff
+    # them
+    differences: Optional[List[Difference]] = None
+    truncated = False
+    # How many differences there were in total, if known
+    total_differences: Optional[int] = None
+    # Extra context shown when the case fails, e.g. how a generated case was found
+    note: Optional[str] = None
+    # The memory allocated by the case, only measured with --memory or by memory
+    # comparisons
+    memory: Optional[MemoryUsage] = None
+    # Whether the comparison checks the bytes allocated by the case, instead of its
+    # result
+    measures_memory = False
+    # The cProfile stats of the case, only set with --profile
+    profile: Optional[dict] = None
     operator = "?"
     negated = "?"
     _not = False
@@ -50,31 +95,96 @@ def Not(comp: BaseComparison):
     return comp
 
 
-class ListEqual(EqualTo):
+class StructureEqual(EqualTo):
+    """
+    Base class for comparisons of nested structures, which record where the received
+    value differs from the expected value, instead of only whether it does.
+    """
+
+    types: tuple = ()
+
+    def __init__(self, expected: Value, limit: int = DIFF_LIMIT):
+        super().__init__(expected)
+        self.limit = limit
+
     def compare(self, result, expected):
-        if not isinstance(result, (list, tuple)):
+        if not isinstance(result, self.types):
             return False
 
-        for result_val, expected_val in zip(result, expected):
-            if result_val != expected_val:
-                return False
+        self.differences, self.truncated = diff(result, expected, self.limit)
+        return not self.differences
+
+
+class ListEqual(StructureEqual):
+    types = (list, tuple)
 
-        return True
 
+class DictEqual(StructureEqual):
+    types = (dict,)
 
-class DictEqual(EqualTo):
-    def compare(self, result: dict, expected: dict):
-        if not isinstance(result, dict):
+
+class ApproxEqual(BaseComparison):
+    """
+    Checks that a number is within `rel` times the larger magnitude, or within `abs`,
+    of the expected number, like `math.isclose`.
+    """
+
+    operator = "~="
+    negated = "!~="
+
+    def __init__(self, expected: Value, rel: float = 1e-09, abs: float = 0.0):
+        super().__init__(expected)
+        self.rel = rel
+        self.abs = abs
+
+    def compare(self, result, expected):
+        try:
+            return cmath.isclose(result, expected, rel_tol=self.rel, abs_tol=self.abs)
+        except TypeError:
             return False
 
-        for result_val, expect_val in zip(result.values(), expected.values()):
-            if isinstance(result_val, dict):
-                if not self.compare(result_val, expect_val):
-                    return False
-            elif result_val != expect_val:
-                return False
 
-        return True
+class ArrayEqual(BaseComparison):
+    """
+    Checks that an array has the same shape and elements as the expected array.
+    Works on NumPy arrays, buffers like `array.array` and `memoryview`, and nested
+    lists.
+    """
+
+    operator = "=="
+    negated = "!="
+    tolerance = None
+
+    def __init__(self, expected: Value, limit: int = DIFF_LIMIT):
+        super().__init__(expected)
+        self.limit = limit
+
+    def compare(self, result, expected):
+        self.differences, self.total_differences = compare_arrays(
+            result, expected, self.tolerance, self.limit
+        )
+        self.truncated = self.total_differences > len(self.differences)
+        return not self.differences
+
+
+class AllClose(ArrayEqual):
+    """
+    Checks that every element of an array is within `abs + rel * abs(expected)` of the
+    expected array's element, like `numpy.allclose`.
+    """
+
+    operator = "~="
+    negated = "!~="
+
+    def __init__(
+        self,
+        expected: Value,
+        rel: float = 1e-05,
+        abs: float = 1e-08,
+        limit: int = DIFF_LIMIT,
+    ):
+        super().__init__(expected, limit)
+        self.tolerance = (rel, abs)
 
 
 class HasType(BaseComparison):
@@ -93,6 +203,15 @@ class LessThan(BaseComparison):
         return result < expected
 
 
+class AllocatesLessThan(LessThan):
+    """
+    Checks the peak bytes allocated while the case ran, instead of the value it
+    returned.
+    """
+
+    measures_memory = True
+
+
 class LessThanOrEqualTo(BaseComparison):
     operator = "<="
     negated = "!<="
@@ -125,32 +244,207 @@ class ToRaise(BaseComparison):
         return isinstance(result, expected)
 
 
+async def _await_within(awaitable, seconds: Optional[float]) -> Value:
+    """
+    Await `awaitable`, raising `CaseTimeout` if it takes longer than `seconds`. Unlike
+    `asyncio.wait_for`, a `TimeoutError` raised by the awaitable itself is left alone.
+    """
+    task = asyncio.ensure_future(awaitable)
+    done, _ = await asyncio.wait({task}, timeout=seconds)
+    if not done:
+        task.cancel()
+        # Let the task handle its cancellation before moving on
+        await asyncio.wait({task})
+        raise CaseTimeout(seconds)
+    return task.result()
+
+
 class ComparisonRunner:
     def __init__(self, test_subject: TestSubject, *args, **kwargs):
+        self._setup(test_subject, args, kwargs)
+
+        # Cases run concurrently are output once they have all finished
+        if _pending is None:
+            self._output()
+
+    @classmethod
+    def quietly(cls, test_subject: TestSubject, *args, **kwargs) -> "ComparisonRunner":
+        """
+        Create a test case without outputting it, for cases which are checked many
+        times before one is reported, e.g. by `cases_from`.
+        """
+        runner = cls.__new__(cls)
+        runner._setup(test_subject, args, kwargs)
+        return runner
+
+    def _setup(self, test_subject: TestSubject, args: tuple, kwargs: dict):
         self._test_subject = test_subject
         self._args = args
         self._kwargs = kwargs
+        # Set by @timeout, which may be on the class of a method
+        self._timeout = getattr(test_subject, "_timeout", None) or getattr(
+            getattr(test_subject, "_parent", None), "_timeout", None
+        )
+
+    def _output(self):
+        output_case_args(self._test_subject, *self._args, **self._kwargs)
 
-        output_case_args(test_subject, *args, **kwargs)
+    def within(self, seconds: float):
+        """
+        Fail the test case if it runs for longer than `seconds`.
+        """
+        self._timeout = seconds
+        return self
+
+    def _call(
+        self,
+        args: tuple,
+        kwargs: dict,
+        tracker: MemoryTracker = None,
+        profiler: cProfile.Profile = None,
+    ) -> Value:
+
+        def call():
+            measured = tracker is not None or profiler is not None
+            if not (measured and callable(self._test_subject)):
+                return call_if_callable(self._test_subject, *args, **kwargs)
+
+            # Only the subject is traced and profiled, not samutil's own calls around it
+            subject = bind_args(self._test_subject, *args, **kwargs)
+            if tracker is not None:
+                tracker.start()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = subject()
+                if profiler is not None:
+                    profiler.disable()
+                if inspect.isawaitable(response):
+                    # The coroutine only runs on the event loop, so that's profiled too
+                    if profiler is not None:
+                        profiler.enable()
+                    response = run_coroutine(response)
+                return response
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                if tracker is not None:
+                    tracker.stop()
+
+        return call_with_timeout(call, case_limit(self._timeout))
+
+    def _prepare(self, comparison) -> Optional[Tuple[tuple, dict, Teardowns]]:
+        """
+        Set up the fixtures used by the case, timed separately from the case itself.
+        Returns None if one couldn't be set up, which fails the case.
+        """
+        # Anything the fixtures or subject print goes after the output of earlier cases
+        get_reporter().flush()
+        if not uses_fixtures(self._test_subject, self._args, self._kwargs):
+            return self._args, self._kwargs, []
 
-    def _run(self, comparison: BaseComparison):
+        t1 = perf_counter()
+        try:
+            return setup_fixtures(self._test_subject, self._args, self._kwargs)
+        except Exception as e:
+            comparison.exception = e
+            return None
+        finally:
+            comparison.setup_time = perf_counter() - t1
+
+    def _teardown(self, comparison, teardowns: Teardowns):
+        error = teardown(teardowns)
+        if error is not None and comparison.exception is None:
+            comparison.exception = error
+
+    def _run(self, comparison: BaseComparison, measure: bool = True):
+        """
+        Run the case and evaluate the comparison. Unless `measure` is set, the case
+        isn't profiled, and its memory is only traced if the comparison checks it.
+        """
+        prepared = self._prepare(comparison)
+        if prepared is None:
+            return self._evaluate(comparison)
+        args, kwargs, teardowns = prepared
+
+        tracker = None
+        if (measure and Settings.memory) or comparison.measures_memory:
+            tracker = MemoryTracker()
+        profiler = cProfile.Profile() if measure and Settings.profile else None
         t1 = perf_counter()
 
         # Only catch errors if the test is checking for an exception
         if isinstance(comparison, ToRaise):
             try:
-                comparison.result = call_if_callable(
-                    self._test_subject, *self._args, **self._kwargs
-                )
+                comparison.result = self._call(args, kwargs, tracker, profiler)
+            except CaseTimeout as e:
+                comparison.exception = e
             except Exception as e:
                 comparison.result = e
         else:
-            comparison.result = call_if_callable(
-                self._test_subject, *self._args, **self._kwargs
-            )
+            try:
+                comparison.result = self._call(args, kwargs, tracker, profiler)
+            except (Exception, CaseTimeout) as e:
+                comparison.exception = e
 
         t2 = perf_counter()
         comparison.time_taken = t2 - t1
+        if tracker is not None and tracker.usage is not None:
+            self._measured(comparison, tracker.usage)
+        if profiler is not None and comparison.time_taken >= Settings.profile_threshold:
+            comparison.profile = case_stats(profiler)
+
+        self._teardown(comparison, teardowns)
+        return self._evaluate(comparison)
+
+    def _measured(self, comparison: BaseComparison, usage: MemoryUsage):
+        comparison.memory = usage
+        # Memory comparisons check the bytes allocated, not the value returned
+        if comparison.measures_memory:
+            comparison.result = usage.peak
+
+    async def _run_async(self, comparison: BaseComparison):
+        """
+        Like `_run`, but awaits coroutine subjects so that other cases can run
+        meanwhile.
+        """
+        prepared = self._prepare(comparison)
+        if prepared is None:
+            return
+        args, kwargs, teardowns = prepared
+
+        limit = case_limit(self._timeout)
+        t1 = perf_counter()
+
+        def call():
+            if callable(self._test_subject):
+                return call_subject(self._test_subject, *args, **kwargs)
+            return self._test_subject
+
+        try:
+            result = call_with_timeout(call, limit)
+            if inspect.isawaitable(result):
+                result = await _await_within(result, limit)
+            comparison.result = result
+        except CaseTimeout as e:
+            comparison.exception = e
+        except Exception as e:
+            # Only catch errors if the test is checking for an exception
+            if isinstance(comparison, ToRaise):
+                comparison.result = e
+            else:
+                comparison.exception = e
+
+        t2 = perf_counter()
+        comparison.time_taken = t2 - t1
+
+        self._teardown(comparison, teardowns)
+
+    def _evaluate(self, comparison: BaseComparison):
+        # A case that raised unexpectedly fails, regardless of the comparison
+        if comparison.exception is not None:
+            comparison.passed = False
+            return comparison
 
         comparison.passed = comparison.compare(comparison.result, comparison.expected)
 
@@ -170,106 +464,142 @@ class ComparisonRunner:
         return comparison
 
     def _parse(self, comparison: BaseComparison):
-        time_unit = "seconds"
-        time_taken = comparison.time_taken
-
-        if time_taken > 0 and time_taken <= 0.01:
-            time_taken = time_taken * 1000  # Convert to milliseconds
-            time_unit = "milliseconds"
-
-            if time_taken <= 0.01:
-                time_taken = time_taken * 1000  # Convert to microseconds
-                time_unit = "microseconds"
+        get_reporter().case_end(comparison)
 
-        time_taken = round(time_taken, sigfigs=3)
-
-        if not comparison.passed:
-            print(f.error("    - FAIL -"))
-
-            print()
-
-            print(
-                f.bold(f.error("    Received")),
-                comparison.negated,
-                f.success(f.bold("Expected")),
-            )
-            print(
-                f.bold("    " + f.error(comparison.result)),
-                comparison.negated,
-                f.success(f.bold(comparison.expected)),
-            )
+    def _record(self, comparison: BaseComparison) -> CaseResult:
+        """
+        Add the outcome of a comparison to the results of the current suite
+        """
+        exception = None
+        if comparison.exception is not None:
+            exception = f"{type(comparison.exception).__name__}: {comparison.exception}"
+
+        result = CaseResult(
+            subject=getattr(self._test_subject, "__name__", str(self._test_subject)),
+            args=format_args(*self._args, **self._kwargs),
+            comparison=type(comparison).__name__,
+            passed=comparison.passed,
+            time_taken=comparison.time_taken,
+            setup_time=comparison.setup_time,
+            exception=exception,
+            operator=comparison.operator,
+            expected=short_repr(comparison.expected),
+            # Passing cases skip formatting their result, which may be large
+            received="" if comparison.passed else short_repr(comparison.result),
+            differences=[str(d) for d in comparison.differences or []] or None,
+            memory=(
+                comparison.memory.to_dict() if comparison.memory is not None else None
+            ),
+        )
+        collector.add_case(result)
+        if comparison.profile is not None:
+            add_profile(collector.suite, comparison.profile)
+        return result
+
+    def _check(self, comparison: BaseComparison) -> CaseResult:
+        if _pending is not None and not comparison.measures_memory:
+            # Run later by `concurrently`, which returns the results
+            _pending.append((self, comparison))
+            return None
+        if _pending is not None:
+            # Allocations can't be told apart between concurrent cases, so finish any
+            # earlier cases first
+            run_concurrently(_pending)
+            _pending.clear()
+            self._output()
+
+        comparison = self._run(comparison)
+        self._parse(comparison)
+        return self._record(comparison)
+
+    def benchmark(self, benchmark: Benchmark = None, **options) -> CaseResult:
+        """
+        Time the test case over many calls instead of checking its result, and report
+        min/median/p95/stddev per call and ops/sec. `options` are passed to `Benchmark`.
+        """
+        if benchmark is None:
+            benchmark = Benchmark(**options)
+
+        if _pending is not None:
+            # Benchmarks aren't run concurrently, so finish any earlier cases first
+            run_concurrently(_pending)
+            _pending.clear()
+            self._output()
+
+        result = CaseResult(
+            subject=getattr(self._test_subject, "__name__", str(self._test_subject)),
+            args=format_args(*self._args, **self._kwargs),
+            comparison=type(benchmark).__name__,
+            passed=True,
+            time_taken=0,
+        )
 
-            if not comparison.same_type:
-                print(
-                    f.warning(
-                        f"\n    Warning: expected and received values had different types."
-                    )
-                )
-                print(
-                    f.success(
-                        f"      Expected: {type(comparison.expected).__name__} ({comparison.expected})"
-                    )
-                )
-                print(
-                    f.error(
-                        f"      Received: {type(comparison.result).__name__} ({comparison.result})"
-                    )
+        get_reporter().flush()
+        try:
+            args, kwargs, teardowns = self._args, self._kwargs, []
+            if uses_fixtures(self._test_subject, self._args, self._kwargs):
+                t1 = perf_counter()
+                args, kwargs, teardowns = setup_fixtures(
+                    self._test_subject, args, kwargs
                 )
+                result.setup_time = perf_counter() - t1
 
-            time_taken != 0 and print(
-                f.magenta(f"\n  Execution time:", f.bold(time_taken, time_unit)) + "\n"
-            )
-        else:
-            print(f.success("    - PASS -"))
-            if not comparison.same_type:
-                print(
-                    f.warning(
-                        f"\n    Warning: expected and received values had different types."
-                    )
-                )
-                print(
-                    f.success(
-                        f"      Expected: {type(comparison.expected).__name__} ({comparison.expected})"
-                    )
-                )
-                print(
-                    f.error(
-                        f"      Received: {type(comparison.result).__name__} ({comparison.result})\n"
-                    )
+            func = bind_subject(self._test_subject, *args, **kwargs)
+            try:
+                stats = call_with_timeout(
+                    lambda: benchmark.run(func), case_limit(self._timeout)
                 )
-            time_taken != 0 and print(
-                f.magenta(f"  Execution time:", f.bold(time_taken, time_unit)) + "\n"
-            )
+            finally:
+                error = teardown(teardowns)
+            if error is not None:
+                raise error
+        except (Exception, CaseTimeout) as e:
+            result.passed = False
+            result.exception = f"{type(e).__name__}: {e}"
+            get_reporter().benchmark_error(result.exception)
+        else:
+            result.time_taken = stats.median
+            result.stats = stats.to_dict()
+            get_reporter().benchmark_end(stats)
+
+        collector.add_case(result)
+        return result
 
     def should_equal(self, expected: Value):
         """
         Result of call should be equal to expected
         """
-        self._parse(self._run(EqualTo(expected)))
+        return self._check(EqualTo(expected))
 
     def should_be_less_than(self, expected: Value):
         """
         Result of call should be less than expected
         """
-        self._parse(self._run(LessThan(expected)))
+        return self._check(LessThan(expected))
+
+    def should_allocate_less_than(self, size: int):
+        """
+        The most memory held at once while the case ran should be less than `size` bytes
+        """
+        return self._check(AllocatesLessThan(size))
 
     def should_be_less_or_equal_to(self, expected: Value):
         """
         Result of call should be less than or equal to expected
         """
-        self._parse(self._run(LessThanOrEqualTo(expected)))
+        return self._check(LessThanOrEqualTo(expected))
 
     def should_be_greater_than(self, expected: Value):
         """
         Result of call should be greater than to expected
         """
-        self._parse(self._run(GreaterThan(expected)))
+        return self._check(GreaterThan(expected))
 
     def should_be_greater_or_equal_to(self, expected: Value):
         """
         Result of call should be greater than or equal to expected
         """
-        self._parse(self._run(GreaterThanOrEqualTo(expected)))
+        return self._check(GreaterThanOrEqualTo(expected))
 
     def should_be(self, comparison: BaseComparison):
         """
@@ -282,4 +612,58 @@ class ComparisonRunner:
                 )
             )
 
-        self._parse(self._run(comparison))
+        return self._check(comparison)
+
+
+def run_concurrently(
+    cases: List[Tuple[ComparisonRunner, BaseComparison]],
+) -> List[CaseResult]:
+    """
+    Run several test cases at once on the event loop, then check and output each of
+    them in order. Coroutine subjects run concurrently, while other subjects run one
+    at a time.
+    """
+
+    async def run_all():
+        await asyncio.gather(
+            *(runner._run_async(comparison) for runner, comparison in cases)
+        )
+
+    run_coroutine(run_all())
+
+    results = []
+    for runner, comparison in cases:
+        runner._output()
+        runner._evaluate(comparison)
+        runner._parse(comparison)
+        results.append(runner._record(comparison))
+    return results
+
+
+def run_pending():
+    """
+    Run any cases waiting to be run concurrently, before a case which can't wait is run.
+    """
+    if _pending:
+        run_concurrently(_pending)
+        _pending.clear()
+
+
+@contextmanager
+def concurrently():
+    """
+    Within this block, test cases are collected instead of run. They are all run
+    concurrently at the end of the block, using `run_concurrently`.
+    """
+    global _pending
+    if _pending is not None:
+        # Already inside a concurrent block
+        yield
+        return
+
+    _pending = []
+    try:
+        yield
+    finally:
+        cases, _pending = _pending, None
+        run_concurrently(cases)
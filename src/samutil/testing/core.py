@@ -1,6 +1,12 @@
 from samutil.formatting import Formatter as f
 
-from .comparisons import ComparisonRunner
+from .comparisons import ComparisonRunner, concurrently
+from .fixtures import end_scope
+from .properties import check_property
+from .reporters import get_reporter
+from .results import collector
+from .tables import run_table
+from .timeouts import start_suite_timer
 from .types import TestSubject
 
 
@@ -27,14 +33,37 @@ class UnitTest:
             name = self._test_subject.__name__
 
         self._test_subject._name = name
+        self._name = name
 
-    def describe(self, testname: str, output: bool = True):
+    def describe(self, testname: str, output: bool = True, timeout: float = None):
+        """
+        Start a new test suite called `testname`. If `timeout` is given, it is the
+        time budget in seconds for every case in the suite combined.
+        """
         self._test_subject._name = testname
+        # Kept on the instance too, as several @test suites can share one subject
+        self._name = testname
+        self._suite_timeout = timeout
         if output:
             self.output_test_name()
 
     def output_test_name(self):
-        print("\n" + f.underline(self._test_subject._name + "\n"))
+        # A .test.py file's suites end when the next one starts
+        end_scope("suite")
+        collector.start_suite(self._name)
+        start_suite_timer(
+            getattr(self, "_suite_timeout", None)
+            or getattr(self._test_subject, "_suite_timeout", None)
+        )
+        get_reporter().suite_start(self._name)
+
+    def concurrently(self):
+        """
+        Collect the test cases created inside a `with` block, and run them concurrently
+        at the end of it. Useful for coroutine subjects which spend most of their time
+        waiting.
+        """
+        return concurrently()
 
     def value(self):
         """
@@ -50,6 +79,40 @@ class UnitTest:
         """
         return ComparisonRunner(self._test_subject, *args, **kwargs)
 
+    def cases_from(
+        self,
+        *strategies,
+        n: int = 100,
+        expect=None,
+        reference=None,
+        seed: int = None,
+        workers: int = 1,
+        **kwarg_strategies,
+    ):
+        """
+        Check the test subject against `n` cases, with arguments generated by
+        `strategies` and `kwarg_strategies`. A failing case is shrunk to the simplest
+        arguments which still fail.
+        """
+        return check_property(
+            self._test_subject,
+            strategies,
+            kwarg_strategies,
+            n=n,
+            expect=expect,
+            reference=reference,
+            seed=seed,
+            workers=workers,
+        )
+
+    def from_table(self, path: str, comparison=None):
+        """
+        Create a test case for every row of a `.csv` or `.jsonl` table, read one row at
+        a time. Each result is checked with `comparison` created from the row's expected
+        value, which is `EqualTo` by default.
+        """
+        run_table(self, path, comparison)
+
     def __call__(self, *args, **kwargs):
         """
         Create a new test case, which calls the callable passed to the `UnitTest` when
@@ -84,4 +147,4 @@ class UnitTest:
         return test
 
     def __str__(self):
-        return self._test_subject._name
+        return self._name
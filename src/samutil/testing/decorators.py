@@ -1,11 +1,21 @@
 import inspect
+import os
+import sys
+from contextlib import nullcontext
 from types import FunctionType
 from typing import Callable
 
 from samutil.formatting import Formatter as f
 
-from .comparisons import BaseComparison, EqualTo
+from .benchmark import Benchmark
+from .comparisons import BaseComparison, EqualTo, concurrently
 from .core import UnitTest
+from .fixtures import Fixture, end_scope
+from .properties import check_property
+from .reporters import get_reporter
+from .results import collector
+from .tables import run_table, table_format
+from .timeouts import start_suite_timer
 from .utils import make_lazy_run_test
 
 
@@ -44,6 +54,170 @@ def expect(*args):
     return deco
 
 
+def benchmark(*args, **options):
+    """
+    Benchmark the test case instead of checking its result. Used in place of `@expect`,
+    directly underneath a `@case`. `options` are passed to `Benchmark`,
+    e.g. `@benchmark(rounds=20)`.
+    """
+
+    def deco(func: Callable) -> Callable:
+        func._is_class = inspect.isclass(func)
+        if not hasattr(func, "_tests"):
+            func._tests = [[]]
+
+        index = 0
+        if hasattr(func, "_test_index"):
+            index = func._test_index
+
+        try:
+            func._tests[index].append(Benchmark(**options))
+        except IndexError:
+            func._tests.append([Benchmark(**options)])
+
+        return func
+
+    # Allow use as both @benchmark and @benchmark(...)
+    if len(args) == 1 and callable(args[0]) and not options:
+        return deco(args[0])
+    elif args:
+        raise ValueError(
+            f.error(
+                "@benchmark only takes keyword arguments, e.g. @benchmark(rounds=20)"
+            )
+        )
+
+    return deco
+
+
+def cases_from(
+    *strategies,
+    n: int = 100,
+    expect=None,
+    reference: Callable = None,
+    seed: int = None,
+    workers: int = 1,
+    **kwarg_strategies,
+):
+    """
+    Check the function against `n` generated cases, drawing each positional argument
+    from one of `strategies` and each keyword argument from `kwarg_strategies`. Every
+    case is checked with the `expect` comparison, or against what `reference` returns
+    for the same arguments. Used in place of `@case` and `@expect`.
+    """
+    if expect is None and reference is None:
+        raise ValueError(
+            f.error(
+                "@cases_from needs an `expect` comparison or a `reference` function"
+            )
+        )
+
+    def deco(func: Callable) -> Callable:
+        func._is_class = inspect.isclass(func)
+        if not hasattr(func, "_tests"):
+            func._tests = [[]]
+
+        index = 0
+        if hasattr(func, "_test_index"):
+            index = func._test_index
+
+        def run_property(test):
+            return lambda: check_property(
+                test._test_subject,
+                strategies,
+                kwarg_strategies,
+                n=n,
+                expect=expect,
+                reference=reference,
+                seed=seed,
+                workers=workers,
+            )
+
+        try:
+            func._tests[index].append(run_property)
+        except IndexError:
+            func._tests.append([run_property])
+
+        return func
+
+    return deco
+
+
+def cases_from_file(path: str, comparison: Callable = None):
+    """
+    Create a test case for every row of a `.csv` or `.jsonl` table, relative to the file
+    the function is defined in. Rows are read one at a time as the cases run, and each
+    result is checked with `comparison` created from the row's expected value (`EqualTo`
+    by default), e.g. `@cases_from_file("golden.jsonl", comparison=ApproxEqual)`.
+    Used in place of `@case` and `@expect`.
+    """
+    table_format(path)
+    # Relative to the file where the decorator is used, which may define a class
+    table = os.path.join(os.path.dirname(sys._getframe(1).f_code.co_filename), path)
+
+    def deco(func: Callable) -> Callable:
+        func._is_class = inspect.isclass(func)
+        if not hasattr(func, "_tests"):
+            func._tests = [[]]
+
+        index = 0
+        if hasattr(func, "_test_index"):
+            index = func._test_index
+
+        def run_rows(test):
+            return lambda: run_table(test, table, comparison)
+
+        try:
+            func._tests[index].append(run_rows)
+        except IndexError:
+            func._tests.append([run_rows])
+
+        return func
+
+    return deco
+
+
+def fixture(*args, scope: str = "function"):
+    """
+    Turn a function which creates a resource into a `Fixture`, which test cases are
+    given in place of their arguments, e.g. `@case(dataset, 3)`. Everything after a
+    `yield` in the function tears the resource down. `scope` is one of 'function',
+    'suite', 'file' or 'session', and the resource is shared by every case in it.
+    """
+
+    def deco(func: Callable) -> Fixture:
+        return Fixture(func, scope)
+
+    # Allow use as both @fixture and @fixture(...)
+    if len(args) == 1 and callable(args[0]):
+        return deco(args[0])
+    elif args:
+        raise ValueError(
+            f.error(
+                "@fixture only takes keyword arguments, e.g. @fixture(scope='suite')"
+            )
+        )
+
+    return deco
+
+
+def timeout(seconds: float, suite: bool = False):
+    """
+    Fail any test case of the decorated function or class which runs for longer than
+    `seconds`. With `suite=True`, `seconds` is instead the time budget for every case
+    in a suite combined.
+    """
+
+    def deco(func: Callable) -> Callable:
+        if suite:
+            func._suite_timeout = seconds
+        else:
+            func._timeout = seconds
+        return func
+
+    return deco
+
+
 def case(*args, **kwargs) -> Callable:
     """
     Decorator which wraps a function and automatically creates a test case with it.
@@ -69,9 +243,10 @@ def case(*args, **kwargs) -> Callable:
     return deco
 
 
-def test(*args):
+def test(*args, concurrent: bool = False):
     """
     Create a new test suite for a function which can be run using `samutil test <file_with_function_declaration>`
+    If `concurrent` is True, the cases of a coroutine function are run concurrently.
     """
     if len(args) > 1:
         raise ValueError(
@@ -81,11 +256,10 @@ def test(*args):
         )
 
     def deco(func: Callable):
-        try:
+        # Named after the function when used bare, e.g. `@test(concurrent=True)`
+        if args and not isinstance(args[0], FunctionType):
             name = str(args[0])
-            if isinstance(name, FunctionType):
-                name = func.__name__
-        except (IndexError, ValueError):
+        else:
             name = func.__name__
 
         if hasattr(func, "_is_class") and func._is_class:
@@ -120,22 +294,30 @@ def test(*args):
 
         def run_tests(fn):
             test.output_test_name()
-            for case in fn._tests[this_suite][::-1]:
-                case(test)()
+            try:
+                with concurrently() if concurrent else nullcontext():
+                    for case in fn._tests[this_suite][::-1]:
+                        case(test)()
+            finally:
+                end_scope("suite")
 
         func._run_tests.append(run_tests)
 
         return func
 
-    if isinstance(args[0], FunctionType):
+    if args and isinstance(args[0], FunctionType):
         return deco(args[0])
     else:
         return deco
 
 
-def testmethod(*args):
+def testmethod(*args, concurrent: bool = False, scope: str = None):
     """
     Create a new test suite for a class method which can be run using `samutil test <file_with_class_declaration>`
+    If `concurrent` is True, the cases of a coroutine method are run concurrently.
+    If `scope` is given, the method is called on an instance of the class, which is
+    created like a fixture, e.g. `scope="suite"` shares one instance between every
+    case in the suite.
     """
     arg_len = len(args)
     if arg_len > 2:
@@ -163,6 +345,8 @@ def testmethod(*args):
             method = getattr(func, methodname)
             method.__dict__.update(func.__dict__)
             method._parent = func
+            if scope is not None:
+                method._instance = Fixture(func, scope)
             test = UnitTest(method)
             test.describe(testname, output=False)
 
@@ -186,10 +370,16 @@ def testmethod(*args):
             )
 
         def run_tests(fn):
-            print("\n" + f.underline(testname + "\n"))
-
-            for case in fn._tests[this_suite][::-1]:
-                case(test)()
+            collector.start_suite(testname)
+            start_suite_timer(getattr(fn, "_suite_timeout", None))
+            get_reporter().suite_start(testname)
+
+            try:
+                with concurrently() if concurrent else nullcontext():
+                    for case in fn._tests[this_suite][::-1]:
+                        case(test)()
+            finally:
+                end_scope("suite")
 
         if not has_tests:
             func._run_tests = [run_tests]
@@ -0,0 +1,134 @@
+import reprlib
+from typing import Any, Iterator, List, Tuple
+
+# Number of differences found before a diff stops looking for more
+DIFF_LIMIT = 10
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 4
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxfrozenset = _repr.maxdeque = 20
+_repr.maxdict = _repr.maxarray = 20
+_repr.maxstring = 120
+_repr.maxlong = 120
+_repr.maxother = 120
+
+
+def short_repr(value: Any) -> str:
+    """
+    Return the repr of `value`, truncated so a large value can't flood the output.
+    """
+    return _repr.repr(value)
+
+
+class Difference:
+    """
+    A single place where a received value differs from the expected value.
+    `kind` is one of 'changed', 'missing', 'unexpected', 'length' or 'shape'.
+    """
+
+    def __init__(
+        self, path: Tuple, kind: str, received: Any = None, expected: Any = None
+    ):
+        self.path = path
+        self.kind = kind
+        self.received = received
+        self.expected = expected
+
+    @property
+    def location(self) -> str:
+        if not self.path:
+            return "result"
+        return "".join(f"[{key!r}]" for key in self.path)
+
+    def __str__(self) -> str:
+        if self.kind == "missing":
+            return f"{self.location}: missing, expected {short_repr(self.expected)}"
+        if self.kind == "unexpected":
+            return f"{self.location}: unexpected {short_repr(self.received)}"
+        if self.kind == "length":
+            return f"{self.location}: length {self.received} != {self.expected}"
+        if self.kind == "shape":
+            return f"{self.location}: shape {self.received} != {self.expected}"
+        received, expected = short_repr(self.received), short_repr(self.expected)
+        return f"{self.location}: {received} != {expected}"
+
+
+def _equal(received: Any, expected: Any) -> bool:
+    try:
+        return received is expected or bool(received == expected)
+    except Exception:
+        # e.g. comparing arrays, whose == result has no single truth value
+        return False
+
+
+def _children(
+    path: Tuple, received: Any, expected: Any, differences: List[Difference], limit: int
+):
+    """
+    Yield the pairs of values nested in `received` and `expected` to compare next,
+    adding any key or length differences found on the way to `differences`.
+    """
+    if isinstance(received, dict) and isinstance(expected, dict):
+        for key, value in expected.items():
+            if key in received:
+                yield path + (key,), received[key], value
+            elif len(differences) <= limit:
+                differences.append(Difference(path + (key,), "missing", expected=value))
+        for key, value in received.items():
+            if key not in expected and len(differences) <= limit:
+                differences.append(
+                    Difference(path + (key,), "unexpected", received=value)
+                )
+        return
+
+    if len(received) != len(expected):
+        differences.append(Difference(path, "length", len(received), len(expected)))
+    for index, (received_value, expected_value) in enumerate(zip(received, expected)):
+        yield path + (index,), received_value, expected_value
+
+
+def _is_container(received: Any, expected: Any) -> bool:
+    return (isinstance(received, dict) and isinstance(expected, dict)) or (
+        isinstance(received, (list, tuple)) and isinstance(expected, (list, tuple))
+    )
+
+
+def diff(
+    received: Any, expected: Any, limit: int = DIFF_LIMIT
+) -> Tuple[List[Difference], bool]:
+    """
+    Find where `received` differs from `expected`, walking nested lists, tuples and
+    dicts depth first without recursion. Dicts are compared by key, regardless of
+    order, and equal values are skipped with a single `==`. Stops after `limit`
+    differences, and returns the differences with whether any more may have been
+    left unchecked.
+    """
+    differences: List[Difference] = []
+    if _equal(received, expected):
+        return differences, False
+    if not _is_container(received, expected):
+        return [Difference((), "changed", received, expected)], False
+
+    stack: List[Iterator] = [_children((), received, expected, differences, limit)]
+    while stack:
+        if len(differences) > limit:
+            return differences[:limit], True
+
+        pair = next(stack[-1], None)
+        if pair is None:
+            stack.pop()
+            continue
+
+        path, received_value, expected_value = pair
+        if _equal(received_value, expected_value):
+            continue
+        if _is_container(received_value, expected_value):
+            stack.append(
+                _children(path, received_value, expected_value, differences, limit)
+            )
+        else:
+            differences.append(
+                Difference(path, "changed", received_value, expected_value)
+            )
+
+    return differences[:limit], len(differences) > limit
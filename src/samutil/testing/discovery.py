@@ -0,0 +1,96 @@
+import ast
+import json
+import os
+from typing import Dict, List
+
+from .cache import CACHE_DIR, ensure_cache_dir
+
+TEST_DECORATORS = {"test", "testmethod", "case"}
+
+
+def decorator_name(node: ast.expr) -> str:
+    """
+    Return the name of a decorator, e.g. 'test' for `@test`, `@test(...)`
+    or `@decorators.test(...)`.
+    """
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def has_tests(filename: str, source: bytes) -> bool:
+    """
+    Statically check whether a file contains tests, without executing it.
+    `.test.py` files must create a `UnitTest`, and other files must use
+    @test, @testmethod or @case on a top level function or class.
+    """
+    is_test_file = filename.endswith(".test.py")
+
+    # Most files can be ruled out without parsing them
+    if is_test_file and b"UnitTest" not in source:
+        return False
+    if not is_test_file and not (b"test" in source or b"case" in source):
+        return False
+
+    try:
+        tree = ast.parse(source, filename)
+    except (SyntaxError, ValueError):
+        # Let the import report the error
+        return True
+
+    if is_test_file:
+        return any(
+            isinstance(node, ast.Call) and decorator_name(node.func) == "UnitTest"
+            for node in ast.walk(tree)
+        )
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if any(decorator_name(d) in TEST_DECORATORS for d in node.decorator_list):
+                return True
+    return False
+
+
+class DiscoveryIndex:
+    """
+    Caches whether each file contains tests, keyed by its modification time and size,
+    so unchanged files are not read again.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "discovery.json")
+
+        try:
+            with open(self.path) as o:
+                self.index: Dict[str, list] = json.load(o)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def has_tests(self, filename: str) -> bool:
+        key = os.path.normpath(filename)
+        stat = os.stat(filename)
+        entry = self.index.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        with open(filename, "rb") as o:
+            found = has_tests(filename, o.read())
+
+        self.index[key] = [stat.st_mtime_ns, stat.st_size, found]
+        return found
+
+    def discover(self, filenames: List[str]) -> List[str]:
+        """
+        Filter `filenames` down to the files which contain tests.
+        """
+        return [filename for filename in filenames if self.has_tests(filename)]
+
+    def save(self):
+        ensure_cache_dir(self.directory)
+        with open(self.path, "w") as o:
+            json.dump(self.index, o)
@@ -0,0 +1,143 @@
+import inspect
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .reporters import get_reporter
+from .types import TestSubject
+
+# From narrowest to widest. Function scoped fixtures are set up again for every case
+SCOPES = ["function", "suite", "file", "session"]
+
+
+class Fixture:
+    """
+    A resource which test cases are given in place of this placeholder,
+    e.g. `@case(dataset, 3)`. `func` creates the resource, and if it's a generator
+    function, everything after its `yield` tears the resource down. The resource is
+    set up the first time a case in `scope` uses it, shared by every later case in
+    that scope, and torn down when the scope ends.
+    """
+
+    def __init__(self, func: Callable, scope: str = "function", name: str = None):
+        if scope not in SCOPES:
+            raise ValueError(
+                f.error(
+                    f"Unknown fixture scope '{scope}', "
+                    f"expected one of {', '.join(SCOPES)}"
+                )
+            )
+        self.func = func
+        self.scope = scope
+        self.name = name or func.__name__
+
+    def __repr__(self) -> str:
+        return f"<fixture {self.name}>"
+
+
+Teardowns = List[Tuple[Fixture, Generator]]
+
+# The values of fixtures set up in each scope, and the generators which tear them down
+_values: Dict[str, Dict[Fixture, Any]] = {scope: {} for scope in SCOPES[1:]}
+_teardowns: Dict[str, Teardowns] = {scope: [] for scope in SCOPES[1:]}
+
+
+def _create(fixture: Fixture, teardowns: Teardowns) -> Any:
+    if not inspect.isgeneratorfunction(fixture.func):
+        return fixture.func()
+
+    generator = fixture.func()
+    try:
+        value = next(generator)
+    except StopIteration:
+        raise ValueError(f"Fixture '{fixture.name}' didn't yield a value") from None
+    teardowns.append((fixture, generator))
+    return value
+
+
+def get_value(fixture: Fixture, teardowns: Teardowns) -> Any:
+    """
+    Return the value of `fixture` in its scope, setting it up if it hasn't been already.
+    The teardowns of function scoped fixtures are added to `teardowns`.
+    """
+    if fixture.scope == "function":
+        return _create(fixture, teardowns)
+
+    values = _values[fixture.scope]
+    if fixture not in values:
+        values[fixture] = _create(fixture, _teardowns[fixture.scope])
+    return values[fixture]
+
+
+def uses_fixtures(test_subject: TestSubject, args: tuple, kwargs: dict) -> bool:
+    return (
+        getattr(test_subject, "_instance", None) is not None
+        or any(isinstance(arg, Fixture) for arg in args)
+        or any(isinstance(arg, Fixture) for arg in kwargs.values())
+    )
+
+
+def setup_fixtures(
+    test_subject: TestSubject, args: tuple, kwargs: dict
+) -> Tuple[tuple, dict, Teardowns]:
+    """
+    Replace every fixture in the arguments of a case with its value. Methods tested with
+    @testmethod are also given an instance of their class, which is itself a fixture.
+    Returns the arguments, and the teardowns to run once the case has finished.
+    """
+    teardowns: Teardowns = []
+    try:
+        args = tuple(
+            get_value(a, teardowns) if isinstance(a, Fixture) else a for a in args
+        )
+        kwargs = {
+            k: get_value(v, teardowns) if isinstance(v, Fixture) else v
+            for k, v in kwargs.items()
+        }
+
+        instance = getattr(test_subject, "_instance", None)
+        if instance is not None:
+            args = (get_value(instance, teardowns),) + args
+    except BaseException:
+        teardown(teardowns)
+        raise
+
+    return args, kwargs, teardowns
+
+
+def teardown(teardowns: Teardowns) -> Optional[Exception]:
+    """
+    Tear down fixtures in the reverse order they were set up. Every teardown is run,
+    even if an earlier one fails, and the first error is returned.
+    """
+    error = None
+    while teardowns:
+        fixture, generator = teardowns.pop()
+        try:
+            next(generator, None)
+        except Exception as e:
+            if error is None:
+                error = e
+    return error
+
+
+def end_scope(scope: str):
+    """
+    Tear down every fixture set up in `scope`, and in any narrower scope.
+    """
+    # Anything the teardowns print goes after the output of the cases in the scope
+    get_reporter().flush()
+    for name in SCOPES[1 : SCOPES.index(scope) + 1]:
+        teardowns = _teardowns[name]
+        _values[name].clear()
+
+        while teardowns:
+            fixture, generator = teardowns.pop()
+            error = teardown([(fixture, generator)])
+            if error is not None:
+                get_reporter().writeln(
+                    f.error(
+                        f"Got error when tearing down fixture '{fixture.name}': "
+                        f"{type(error).__name__}: {error}"
+                    )
+                )
@@ -0,0 +1,140 @@
+import heapq
+import os
+import tracemalloc
+from typing import List, Optional, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .reporters import truncate
+from .results import CaseResult, FileResult
+
+# Allocation sites kept for each case, and how many of the cases which kept the most
+# memory in each process have their sites recorded
+TOP_SITES = 5
+WORST_CASES = 5
+
+_ignored = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    # Calling the case, rather than the case itself
+    tracemalloc.Filter(False, os.path.join(os.path.dirname(__file__), "*")),
+]
+# The net bytes of the cases whose allocation sites were recorded, smallest first
+_worst: List[int] = []
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class MemoryUsage:
+    """
+    The memory a test case allocated: the most it held at once (`peak`), and how much
+    was still allocated when it finished (`net`), e.g. by a cache or a leak. `sites` are
+    the lines which allocated the most of the memory still held, if they were recorded.
+    """
+
+    def __init__(
+        self, peak: int, net: int, sites: Optional[List[Tuple[str, int]]] = None
+    ):
+        self.peak = peak
+        self.net = net
+        self.sites = sites or []
+
+    def to_dict(self) -> dict:
+        return {
+            "peak": self.peak,
+            "net": self.net,
+            "sites": [
+                {"location": location, "size": size} for location, size in self.sites
+            ],
+        }
+
+
+def _is_worst(net: int) -> bool:
+    if net <= 0:
+        return False
+    if len(_worst) < WORST_CASES:
+        heapq.heappush(_worst, net)
+        return True
+    if net > _worst[0]:
+        heapq.heapreplace(_worst, net)
+        return True
+    return False
+
+
+def _sites() -> List[Tuple[str, int]]:
+    snapshot = tracemalloc.take_snapshot().filter_traces(_ignored)
+    return [
+        (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size)
+        for stat in snapshot.statistics("lineno")[:TOP_SITES]
+    ]
+
+
+class MemoryTracker:
+    """
+    Measures the memory allocated between `start` and `stop` using `tracemalloc`, which
+    only traces allocations in between. Memory allocated before `start` isn't counted,
+    even if it's freed before `stop`.
+    """
+
+    def __init__(self):
+        # Set by `stop`
+        self.usage: Optional[MemoryUsage] = None
+        self._started = False
+
+    def start(self):
+        if tracemalloc.is_tracing():
+            # Also resets the peak
+            tracemalloc.clear_traces()
+        else:
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self) -> MemoryUsage:
+        net, peak = tracemalloc.get_traced_memory()
+        # Only the cases which kept the most memory take a snapshot, which is slow
+        sites = _sites() if _is_worst(net) else None
+        if self._started:
+            tracemalloc.stop()
+
+        self.usage = MemoryUsage(peak, net, sites)
+        return self.usage
+
+
+def output_memory(files: List[FileResult], limit: int = 10):
+    """
+    Print a table of the cases with the highest peak memory, and where the memory
+    they still held when they finished was allocated.
+    """
+    cases: List[Tuple[str, CaseResult]] = [
+        (truncate(f"{suite.name}::{case.name}"), case)
+        for file in files
+        for suite in file.suites
+        for case in suite.cases
+        if case.memory is not None
+    ]
+
+    print(f.bold("\nMemory"), f.info("(highest peak first)"))
+    if not cases:
+        print(f.warning("  No cases were measured.\n"))
+        return
+
+    cases.sort(key=lambda item: item[1].memory["peak"], reverse=True)
+    rows = cases[:limit]
+    width = max(len(name) for name, _ in rows)
+
+    print(f.bold(f"  {'Case':<{width}}  {'Peak':>12}  {'Net':>12}"))
+    for name, case in rows:
+        memory = case.memory
+        peak, net = format_bytes(memory["peak"]), format_bytes(memory["net"])
+        line = f"  {name:<{width}}  {peak:>12}  {net:>12}"
+        print(f.warning(line) if memory["net"] > 0 else line)
+        for site in memory["sites"]:
+            print(f.info(f"      {format_bytes(site['size']):>10}  {site['location']}"))
+    print()
@@ -0,0 +1,172 @@
+import cProfile
+import os
+import pstats
+import re
+from typing import Dict, List, Optional, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .cache import CACHE_DIR
+from .reporters import format_time
+from .results import FileResult, SuiteResult
+
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+# Stacks deeper than this are cut short in collapsed stack files
+MAX_DEPTH = 64
+
+# cProfile's stats: (filename, line, function) -> (primitive calls, calls, self time,
+# cumulative time, {caller: (primitive calls, calls, self time, cumulative time)})
+Function = Tuple[str, int, str]
+ProfileStats = Dict[Function, tuple]
+
+
+def case_stats(profiler: cProfile.Profile) -> ProfileStats:
+    """
+    Return the stats of a profiled case, without the call which stopped the profiler.
+    """
+    profiler.create_stats()
+    return {
+        function: stat
+        for function, stat in profiler.stats.items()
+        if not (function[0] == "~" and function[2].startswith("<method 'disable'"))
+    }
+
+
+def to_stats(stats: ProfileStats) -> pstats.Stats:
+    result = pstats.Stats()
+    result.stats = stats
+    result.get_top_level_stats()
+    return result
+
+
+def merge_stats(first: Optional[ProfileStats], second: ProfileStats) -> ProfileStats:
+    """
+    Combine the stats of 2 profiles, as if everything in them ran in a single profile.
+    """
+    if not first:
+        return second
+    merged = to_stats(first)
+    merged.add(to_stats(second))
+    return merged.stats
+
+
+def add_profile(suite: SuiteResult, stats: ProfileStats):
+    suite.profile = merge_stats(suite.profile, stats)
+
+
+def function_name(function: Function) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Built in functions, e.g. "<built-in method builtins.sorted>"
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def collapse_stacks(stats: ProfileStats) -> Dict[str, int]:
+    """
+    Estimate the time spent in every stack of calls, in microseconds, for flame graph
+    tools. cProfile only records which function called which, so the time a function
+    spent when called from a caller is split between that caller's own stacks in
+    proportion to them.
+    """
+    callees: Dict[Function, List[Function]] = {function: [] for function in stats}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller in callers:
+            if caller in callees:
+                callees[caller].append(function)
+
+    stacks: Dict[str, int] = {}
+    roots = [function for function, stat in stats.items() if not stat[4]]
+    # (function, the stack above it, the share of the function's time spent in that
+    # stack)
+    pending = [(root, (), 1.0) for root in roots]
+    while pending:
+        function, stack, share = pending.pop()
+        stack = stack + (function_name(function),)
+        _, _, self_time, cumulative, _ = stats[function]
+
+        micros = int(self_time * share * 1e6)
+        if micros:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + micros
+
+        if len(stack) >= MAX_DEPTH or not cumulative:
+            continue
+        for callee in callees[function]:
+            callee_cumulative = stats[callee][3]
+            edge_cumulative = stats[callee][4][function][3]
+            # Recursive calls are already counted in the outer call's time
+            if callee == function or not callee_cumulative:
+                continue
+            # Stacks which took less than a microsecond are left out
+            if share * edge_cumulative < 1e-6:
+                continue
+            pending.append((callee, stack, share * edge_cumulative / callee_cumulative))
+
+    return stacks
+
+
+def _filename(file: FileResult, index: int, suite: SuiteResult) -> str:
+    """
+    Name the profile of the `index`th suite in `file`, e.g. 'tests_add-0-Adds'.
+    The index keeps suites which share a name from overwriting each other.
+    """
+    filename = os.path.splitext(os.path.relpath(os.path.normpath(file.filename)))[0]
+    name = f"{filename}-{index}-{suite.name}"
+    # Leading dots and separators, e.g. from '../', would make a hidden file
+    return re.sub(r"[^\w.-]+", "_", name).lstrip("._-").rstrip("_")
+
+
+def write_profiles(files: List[FileResult], directory: str = PROFILE_DIR) -> int:
+    """
+    Write the profile of every suite to `directory`, as a `.pstats` file which can be
+    read with `pstats` or snakeviz, and a `.collapsed` file of stacks for flame graph
+    tools. Returns the number of suites written.
+    """
+    written = 0
+    for file in files:
+        for index, suite in enumerate(file.suites):
+            if not suite.profile:
+                continue
+
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, _filename(file, index, suite))
+            to_stats(suite.profile).dump_stats(path + ".pstats")
+            with open(path + ".collapsed", "w") as o:
+                for stack, micros in sorted(collapse_stacks(suite.profile).items()):
+                    o.write(f"{stack} {micros}\n")
+            written += 1
+
+    return written
+
+
+def output_profile(
+    files: List[FileResult], directory: str = PROFILE_DIR, limit: int = 20
+):
+    """
+    Write the profile of every suite, and print the functions which took the most time
+    themselves, across every profiled case.
+    """
+    stats: Optional[ProfileStats] = None
+    for file in files:
+        for suite in file.suites:
+            if suite.profile:
+                stats = merge_stats(stats, suite.profile)
+
+    print(f.bold("\nProfile"), f.info("(most self time first)"))
+    if not stats:
+        print(f.warning("  No cases were profiled.\n"))
+        return
+
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    print(f.bold(f"  {'Self':>18}  {'Cumulative':>18}  {'Calls':>10}  Function"))
+    for function, (_, calls, self_time, cumulative, _) in rows:
+        own = "%s %s" % format_time(self_time)
+        total = "%s %s" % format_time(cumulative)
+        print(f"  {own:>18}  {total:>18}  {calls:>10,}  {function_name(function)}")
+
+    written = write_profiles(files, directory)
+    print(
+        f.success(f"\n  Wrote the profiles of {written} suite(s) to"),
+        f.bold(directory) + "\n",
+    )
@@ -0,0 +1,294 @@
+import copy
+import math
+import multiprocessing
+import random
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from samutil.formatting import Formatter as f
+
+from .comparisons import BaseComparison, ComparisonRunner, EqualTo, run_pending
+from .results import CaseResult
+from .strategies import Strategy, as_strategy
+from .types import TestSubject
+
+# Cases generated at once from each seed, and checked by a worker in one go
+BATCH_SIZE = 100
+# Most simpler arguments tried while shrinking a failing case
+MAX_SHRINK_ATTEMPTS = 10_000
+
+Arguments = Tuple[tuple, Dict[str, Any]]
+# A comparison, or a function returning one from the result of `reference`
+Expectation = Union[BaseComparison, Callable[[Any], BaseComparison]]
+
+
+class GeneratedCases:
+    """
+    Stands in for the arguments of a case which was checked against generated arguments.
+    """
+
+    def __init__(self, n: int, seed: int):
+        self.n = n
+        self.seed = seed
+
+    def __str__(self) -> str:
+        return f"<{self.n} generated cases, seed={self.seed}>"
+
+
+class ReferenceResults:
+    """
+    Stands in for the expected values of generated cases, which were each the result
+    of calling `reference` with the same arguments as the case.
+    """
+
+    def __init__(self, reference: Callable):
+        self.reference = reference
+
+    def __repr__(self) -> str:
+        return f"<results of {getattr(self.reference, '__name__', self.reference)}>"
+
+    __str__ = __repr__
+
+
+class MatchesReference(BaseComparison):
+    """
+    Records generated cases which all matched a reference implementation, once every
+    case has been checked with its own comparison.
+    """
+
+    operator = "matches"
+    negated = "doesn't match"
+
+    def __init__(self, reference: Callable):
+        super().__init__(ReferenceResults(reference))
+
+
+class Property:
+    """
+    Checks a test subject against `n` cases, whose arguments are drawn from `strategies`
+    and `kwarg_strategies`. Each batch of cases has its own seed, derived from `seed`,
+    so any batch can be regenerated on its own, in any process.
+    """
+
+    def __init__(
+        self,
+        test_subject: TestSubject,
+        strategies: Sequence[Strategy],
+        kwarg_strategies: Dict[str, Strategy],
+        n: int,
+        expect: Optional[Expectation] = None,
+        reference: Optional[Callable] = None,
+        seed: Optional[int] = None,
+    ):
+        if expect is None and reference is None:
+            raise ValueError(
+                f.error(
+                    "Generated cases need an `expect` comparison "
+                    "or a `reference` function"
+                )
+            )
+        if reference is None and not isinstance(expect, BaseComparison):
+            expect = EqualTo(expect)
+
+        self.test_subject = test_subject
+        self.strategies = [as_strategy(s) for s in strategies]
+        self.kwarg_strategies = {k: as_strategy(s) for k, s in kwarg_strategies.items()}
+        self.n = n
+        self.expect = expect
+        self.reference = reference
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+
+    @property
+    def batches(self) -> int:
+        return math.ceil(self.n / BATCH_SIZE)
+
+    def arguments(self, batch: int) -> List[Arguments]:
+        """
+        Generate the arguments of every case in `batch`.
+        """
+        rng = Random(f"{self.seed}:{batch}")
+        count = min(BATCH_SIZE, self.n - batch * BATCH_SIZE)
+        # Each argument is generated for the whole batch at once
+        columns = [s.batch(rng, count) for s in self.strategies]
+        kwarg_columns = {
+            k: s.batch(rng, count) for k, s in self.kwarg_strategies.items()
+        }
+        return [
+            (
+                tuple(column[i] for column in columns),
+                {k: column[i] for k, column in kwarg_columns.items()},
+            )
+            for i in range(count)
+        ]
+
+    def comparison(self, args: tuple, kwargs: dict) -> BaseComparison:
+        """
+        Create a fresh comparison to check the case called with `args` and `kwargs`.
+        """
+        if self.reference is None:
+            return copy.copy(self.expect)
+        try:
+            expected = self.reference(*args, **kwargs)
+        except Exception as e:
+            comparison = (self.expect or EqualTo)(ReferenceResults(self.reference))
+            comparison.exception = e
+            comparison.note = "the exception was raised by the reference"
+            return comparison
+        return (self.expect or EqualTo)(expected)
+
+    def run(
+        self, args: tuple, kwargs: dict, runner: Optional[ComparisonRunner] = None
+    ) -> BaseComparison:
+        """
+        Check the case called with `args` and `kwargs`. A case which is reported is
+        passed its own `runner`, and only then profiled and has its memory measured.
+        """
+        measure = runner is not None
+        if runner is None:
+            runner = ComparisonRunner.quietly(self.test_subject, *args, **kwargs)
+        comparison = self.comparison(args, kwargs)
+        if comparison.exception is not None:
+            # The reference raised, so there's nothing to check the subject against
+            return runner._evaluate(comparison)
+        return runner._run(comparison, measure=measure)
+
+    def check_batch(self, batch: int) -> Optional[int]:
+        """
+        Check every case in `batch`, returning the index of the first that fails.
+        """
+        for index, (args, kwargs) in enumerate(self.arguments(batch)):
+            if not self.run(args, kwargs).passed:
+                return index
+        return None
+
+    def candidates(self, args: tuple, kwargs: dict) -> Iterator[Arguments]:
+        """
+        Yield the arguments with a single argument replaced by a simpler version of
+        itself.
+        """
+        for i, strategy in enumerate(self.strategies):
+            for value in strategy.shrink(args[i]):
+                yield args[:i] + (value,) + args[i + 1 :], kwargs
+        for key, strategy in self.kwarg_strategies.items():
+            for value in strategy.shrink(kwargs[key]):
+                yield args, {**kwargs, key: value}
+
+    def shrink(self, args: tuple, kwargs: dict) -> Tuple[tuple, dict, int]:
+        """
+        Repeatedly replace the arguments of a failing case with the first simpler
+        arguments which still fail, until none do. Returns the simplest arguments
+        found, and how many times they were simplified.
+        """
+        steps = 0
+        attempts = 0
+        shrunk = True
+        while shrunk and attempts < MAX_SHRINK_ATTEMPTS:
+            shrunk = False
+            for candidate_args, candidate_kwargs in self.candidates(args, kwargs):
+                attempts += 1
+                if not self.run(candidate_args, candidate_kwargs).passed:
+                    args, kwargs = candidate_args, candidate_kwargs
+                    steps += 1
+                    shrunk = True
+                    break
+                if attempts >= MAX_SHRINK_ATTEMPTS:
+                    break
+        return args, kwargs, steps
+
+
+# Set before forking workers, which inherit it instead of having it pickled
+_property: Optional[Property] = None
+
+
+def _check_batch(batch: int) -> Tuple[int, Optional[int]]:
+    return batch, _property.check_batch(batch)
+
+
+def _can_fork() -> bool:
+    return (
+        "fork" in multiprocessing.get_all_start_methods()
+        # Daemon processes, e.g. `multiprocessing.Pool` workers, can't have children
+        and not multiprocessing.current_process().daemon
+    )
+
+
+def find_failure(prop: Property, workers: int = 1) -> Optional[Tuple[int, int]]:
+    """
+    Check every batch of cases, returning the batch and index of the first failing case.
+    With several `workers`, batches are checked in forked processes, which are sent
+    only the number of each batch to check.
+    """
+    global _property
+    if workers <= 1 or prop.batches <= 1 or not _can_fork():
+        for batch in range(prop.batches):
+            index = prop.check_batch(batch)
+            if index is not None:
+                return batch, index
+        return None
+
+    _property = prop
+    try:
+        processes = min(workers, prop.batches)
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            # Batches are returned in order, so the failure found is the same as when
+            # run serially
+            for batch, index in pool.imap(_check_batch, range(prop.batches)):
+                if index is not None:
+                    return batch, index
+    finally:
+        _property = None
+    return None
+
+
+def check_property(
+    test_subject: TestSubject,
+    strategies: Sequence[Strategy],
+    kwarg_strategies: Dict[str, Strategy],
+    n: int = 100,
+    expect: Optional[Expectation] = None,
+    reference: Optional[Callable] = None,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> CaseResult:
+    """
+    Check `test_subject` against `n` generated cases, and report them as a single case.
+    If one fails, it is shrunk to the simplest arguments which still fail, and reported
+    with those arguments and the seed to reproduce it with.
+    """
+    prop = Property(
+        test_subject, strategies, kwarg_strategies, n, expect, reference, seed
+    )
+    # Cases waiting to run concurrently are output first, to keep the output in order
+    run_pending()
+
+    start = perf_counter()
+    failure = find_failure(prop, workers)
+    seconds = perf_counter() - start
+
+    if failure is None:
+        runner = ComparisonRunner.quietly(test_subject, GeneratedCases(n, prop.seed))
+        runner._output()
+        if prop.reference is None:
+            comparison = copy.copy(prop.expect)
+        else:
+            comparison = MatchesReference(prop.reference)
+        comparison.passed = True
+        comparison.time_taken = seconds / n if n else 0.0
+        runner._parse(comparison)
+        return runner._record(comparison)
+
+    batch, index = failure
+    args, kwargs = prop.arguments(batch)[index]
+    args, kwargs, steps = prop.shrink(args, kwargs)
+
+    runner = ComparisonRunner.quietly(test_subject, *args, **kwargs)
+    runner._output()
+    comparison = prop.run(args, kwargs, runner)
+    falsified = (
+        f"Falsified after {batch * BATCH_SIZE + index + 1} of {n} generated cases "
+        f"(seed={prop.seed}), and shrunk {steps} times"
+    )
+    comparison.note = "; ".join(filter(None, (falsified, comparison.note)))
+    runner._parse(comparison)
+    return runner._record(comparison)
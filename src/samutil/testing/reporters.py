@@ -0,0 +1,362 @@
+import sys
+from typing import List, TextIO, Tuple
+
+from samutil.formatting import BOLD, ERROR, SUCCESS, ColorCodes, ColoredText, Style
+from samutil.formatting import Formatter as f
+from sigfig import round
+
+from .settings import Settings
+
+BOLD_ERROR = Style(ColorCodes.RED, bold=True)
+BOLD_SUCCESS = Style(ColorCodes.GREEN, bold=True)
+# Case names longer than this are cut short in tables
+NAME_WIDTH = 60
+
+
+def format_time(seconds: float) -> Tuple[float, str]:
+    """
+    Convert a time in seconds to the most readable unit, rounded to 3 significant
+    figures.
+    """
+    time_taken = seconds
+    time_unit = "seconds"
+
+    if time_taken > 0 and time_taken <= 0.01:
+        time_taken = time_taken * 1000  # Convert to milliseconds
+        time_unit = "milliseconds"
+
+        if time_taken <= 0.01:
+            time_taken = time_taken * 1000  # Convert to microseconds
+            time_unit = "microseconds"
+
+            if time_taken <= 0.01:
+                time_taken = time_taken * 1000  # Convert to nanoseconds
+                time_unit = "nanoseconds"
+
+    return round(time_taken, sigfigs=3), time_unit
+
+
+def format_args(*args, **kwargs) -> str:
+    """
+    Format a test's arguments the way they would appear in a call.
+    """
+    formatted_kwargs = [f"{k}={v}" for (k, v) in kwargs.items()]
+    args = tuple(map(str, args))
+    return ", ".join([*args, *formatted_kwargs])
+
+
+def truncate(text: str, width: int = NAME_WIDTH) -> str:
+    """
+    Cut `text` short with '...' if it's longer than `width`, e.g. a case name with
+    large arguments in a table.
+    """
+    if len(text) <= width:
+        return text
+    return text[: width - 3] + "..."
+
+
+def line(*values, sep: str = " ") -> str:
+    """
+    Join `values` into a line of text, in the same way as `print`.
+    """
+    return sep.join(map(str, values)) + "\n"
+
+
+class Reporter:
+    """
+    Writes the output of a test run into a single buffered stream. Output is flushed
+    at the end of every file, once `buffer_size` characters are waiting, and before
+    each case runs, so anything the case prints itself appears next to it.
+    """
+
+    def __init__(self, stream: TextIO = None, buffer_size: int = 1 << 16):
+        # Resolved when flushing, so redirecting stdout also redirects the reporter
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def write(self, text: str):
+        if isinstance(text, ColoredText):
+            text.write_to(self)
+            return
+
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def writeln(self, *values, sep: str = " "):
+        self.write(line(*values, sep=sep))
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        stream = self.stream or sys.stdout
+        stream.write("".join(self._buffer))
+        stream.flush()
+        self._buffer = []
+        self._buffered = 0
+
+    def render_call(self, test_subject, args: tuple, kwargs: dict) -> str:
+        formatted_args = format_args(*args, **kwargs)
+        formatted_output = f.bold(test_subject.__name__ + "(" + formatted_args + ")")
+        return line(f.info("  RUNS", f.bold(formatted_output), "\b:"))
+
+    def render_types(self, comparison) -> str:
+        expected, result = comparison.expected, comparison.result
+        return (
+            line(
+                f.warning(
+                    "\n    Warning: expected and received values had different types."
+                )
+            )
+            + line(f.success(f"      Expected: {type(expected).__name__} ({expected})"))
+            + line(f.error(f"      Received: {type(result).__name__} ({result})"))
+        )
+
+    def render_result(self, comparison) -> str:
+        time_taken, time_unit = format_time(comparison.time_taken)
+        output = []
+
+        if comparison.exception is not None:
+            output.append(line(ERROR.label("    - FAIL -")))
+            output.append("\n")
+            output.append(
+                line(
+                    BOLD_ERROR.label("    Raised"),
+                    f.error(
+                        f"{type(comparison.exception).__name__}: {comparison.exception}"
+                    ),
+                )
+            )
+        elif not comparison.passed and comparison.differences:
+            output.append(line(ERROR.label("    - FAIL -")))
+            output.append("\n")
+            output.append(self.render_differences(comparison))
+            if not comparison.same_type:
+                output.append(self.render_types(comparison))
+        elif not comparison.passed:
+            output.append(line(ERROR.label("    - FAIL -")))
+            output.append("\n")
+            output.append(
+                line(
+                    BOLD_ERROR.label("    Received"),
+                    comparison.negated,
+                    BOLD_SUCCESS.label("Expected"),
+                )
+            )
+            output.append(
+                line(
+                    f.bold("    " + f.error(comparison.result)),
+                    comparison.negated,
+                    f.success(f.bold(comparison.expected)),
+                )
+            )
+            if not comparison.same_type:
+                output.append(self.render_types(comparison))
+        else:
+            output.append(line(SUCCESS.label("    - PASS -")))
+            if not comparison.same_type:
+                output.append(self.render_types(comparison) + "\n")
+            if time_taken != 0:
+                output.append(
+                    line(
+                        f.magenta("  Execution time:", f.bold(time_taken, time_unit))
+                        + self.render_setup_time(comparison)
+                        + "\n"
+                    )
+                )
+            return "".join(output)
+
+        if comparison.note:
+            output.append(line(f.info("\n    " + comparison.note)))
+        if time_taken != 0:
+            output.append(
+                line(
+                    f.magenta("\n  Execution time:", f.bold(time_taken, time_unit))
+                    + self.render_setup_time(comparison)
+                    + "\n"
+                )
+            )
+        return "".join(output)
+
+    def render_setup_time(self, comparison) -> str:
+        """
+        The time spent setting up fixtures, which isn't included in the execution time.
+        """
+        if not comparison.setup_time:
+            return ""
+        setup_time, setup_unit = format_time(comparison.setup_time)
+        return " " + f.info(f"(setup: {setup_time} {setup_unit})")
+
+    def render_differences(self, comparison) -> str:
+        """
+        List where the received value differs from the expected value, instead of
+        printing both.
+        """
+        count = len(comparison.differences)
+        if comparison.total_differences is not None and comparison.truncated:
+            counted = f"(first {count} of {comparison.total_differences:,})"
+        elif comparison.truncated:
+            counted = f"(first {count})"
+        else:
+            counted = f"({count})"
+
+        output = [line(BOLD_ERROR.label("    Differences"), f.info(counted))]
+        for difference in comparison.differences:
+            output.append(line(f.error(f"      {difference}")))
+        if comparison.truncated:
+            output.append(line(f.info("      ... more differences not shown")))
+        return "".join(output)
+
+    def render_benchmark(self, stats) -> str:
+        output = [line(SUCCESS.label("    - BENCH -"))]
+        for label in ("min", "median", "p95", "stddev"):
+            time_taken, time_unit = format_time(getattr(stats, label))
+            output.append(
+                line(f.magenta(f"    {label + ':':<8}", f.bold(time_taken, time_unit)))
+            )
+
+        output.append(
+            line(
+                f.magenta(f"    {'ops/sec:':<8}", f.bold(f"{stats.ops:,.0f}")),
+                f.info(f"({stats.rounds} rounds of {stats.loops:,} loops)") + "\n",
+            )
+        )
+        return "".join(output)
+
+    def render_exception(self, exception: str) -> str:
+        return (
+            line(ERROR.label("    - FAIL -"))
+            + "\n"
+            + line(BOLD_ERROR.label("    Raised"), f.error(exception) + "\n")
+        )
+
+    def file_start(self, filename: str):
+        pass
+
+    def file_header(self, filename: str):
+        self.writeln(f.bold("\nFile:", filename))
+
+    def suite_start(self, name: str):
+        self.writeln("\n" + f.underline(name + "\n"))
+
+    def case_start(self, test_subject, args: tuple, kwargs: dict):
+        self.write(self.render_call(test_subject, args, kwargs))
+
+    def case_end(self, comparison):
+        self.write(self.render_result(comparison))
+
+    def benchmark_end(self, stats):
+        self.write(self.render_benchmark(stats))
+
+    def benchmark_error(self, exception: str):
+        self.write(self.render_exception(exception))
+
+    def file_end(self, filename: str):
+        self.flush()
+
+    def summary(self, collector):
+        failures = collector.failures
+        tests = collector.tests
+
+        counts = ["\n" + BOLD.label("Tests:")]
+        if failures:
+            counts.append(f.error(f"{failures} failed,"))
+        counts.append(f.success(f"{tests - failures} passed,"))
+        counts.append(f"{tests} total")
+        if collector.errors:
+            counts.append(f.error(f"({collector.errors} file(s) raised an error)"))
+
+        self.writeln(*counts)
+        self.flush()
+
+
+class DotsReporter(Reporter):
+    """
+    Writes a dot for every passing case, and only prints failing cases in full,
+    at the end of each file. Passing cases are never formatted.
+    """
+
+    def __init__(self, stream: TextIO = None, buffer_size: int = 1 << 16):
+        super().__init__(stream, buffer_size)
+        self._filename = None
+        self._started = False
+        self._suite = None
+        self._call = None
+        self._failures = []
+
+    def file_start(self, filename: str):
+        self._filename = filename
+        self._started = False
+
+    def file_header(self, filename: str):
+        pass
+
+    def suite_start(self, name: str):
+        self._suite = name
+
+    def case_start(self, test_subject, args: tuple, kwargs: dict):
+        # Only formatted if the case fails
+        self._call = (test_subject, args, kwargs)
+
+    def _mark(self, passed: bool):
+        if not self._started:
+            self._started = True
+            self.write(f.bold(self._filename or "") + " ")
+        self.write("." if passed else ERROR.label("F"))
+
+    def case_end(self, comparison):
+        self._mark(comparison.passed)
+        if not comparison.passed:
+            self._failures.append((self._suite, self._call, comparison))
+
+    def benchmark_end(self, stats):
+        self._mark(True)
+
+    def benchmark_error(self, exception: str):
+        self._mark(False)
+        self._failures.append((self._suite, self._call, exception))
+
+    def file_end(self, filename: str):
+        if self._started:
+            self.write("\n")
+
+        for suite, call, failure in self._failures:
+            self.writeln(
+                "\n" + BOLD_ERROR.label("FAIL"), f.underline(suite or filename)
+            )
+            self.write(self.render_call(*call))
+            if isinstance(failure, str):
+                self.write(self.render_exception(failure))
+            else:
+                self.write(self.render_result(failure))
+
+        self._failures = []
+        self._started = False
+        self.flush()
+
+
+_reporter = None
+
+
+def get_reporter() -> Reporter:
+    """
+    Return the reporter for this process, created from `Settings` on first use.
+    """
+    global _reporter
+    if _reporter is None:
+        _reporter = DotsReporter() if Settings.quiet else Reporter()
+    return _reporter
+
+
+def set_reporter(reporter: Reporter):
+    """
+    Replace the reporter for this process. Passing None recreates it from `Settings`.
+    """
+    global _reporter
+    if _reporter is not None:
+        _reporter.flush()
+    _reporter = reporter
@@ -0,0 +1,106 @@
+import json
+import xml.etree.ElementTree as ET
+from typing import List
+
+from .results import FileResult, SuiteResult
+
+REPORT_FORMATS = ["json", "junit"]
+
+
+def write_json(files: List[FileResult], filename: str):
+    """
+    Write the results of a test run to `filename` as JSON.
+    """
+    report = {
+        "tests": sum(file.tests for file in files),
+        "failures": sum(file.failures for file in files),
+        "passed": all(file.passed for file in files),
+        "files": [file.to_dict() for file in files],
+    }
+    with open(filename, "w") as o:
+        json.dump(report, o, indent=2)
+
+
+def _errors(suite: SuiteResult) -> int:
+    """
+    The number of cases in `suite` which raised unexpectedly. JUnit counts these as
+    errors, not failures.
+    """
+    return sum(1 for case in suite.cases if case.exception)
+
+
+def write_junit(files: List[FileResult], filename: str):
+    """
+    Write the results of a test run to `filename` as JUnit XML, with one
+    <testsuite> per suite, named after its file.
+    """
+    suites = [suite for file in files for suite in file.suites]
+    errors = sum(_errors(suite) for suite in suites)
+    root = ET.Element(
+        "testsuites",
+        tests=str(sum(file.tests for file in files)),
+        failures=str(sum(suite.failures for suite in suites) - errors),
+        errors=str(errors + sum(1 for file in files if file.error)),
+        time=f"{sum(file.time_taken for file in files):.6f}",
+    )
+
+    for file in files:
+        if file.error:
+            suite_el = ET.SubElement(
+                root,
+                "testsuite",
+                name=file.filename,
+                tests="0",
+                failures="0",
+                errors="1",
+            )
+            ET.SubElement(suite_el, "error", message="Error running file").text = (
+                file.error
+            )
+
+        for suite in file.suites:
+            suite_el = ET.SubElement(
+                root,
+                "testsuite",
+                name=f"{file.filename}::{suite.name}",
+                tests=str(suite.tests),
+                failures=str(suite.failures - _errors(suite)),
+                errors=str(_errors(suite)),
+                time=f"{suite.time_taken:.6f}",
+            )
+            for case in suite.cases:
+                case_el = ET.SubElement(
+                    suite_el,
+                    "testcase",
+                    classname=f"{file.filename}::{suite.name}",
+                    name=case.name,
+                    time=f"{case.time_taken:.6f}",
+                )
+                if case.exception:
+                    ET.SubElement(case_el, "error", message=case.exception).text = (
+                        case.exception
+                    )
+                elif not case.passed:
+                    if case.regression is not None:
+                        message = f"Median time regressed by {case.regression:.1%}"
+                    else:
+                        message = f"Expected {case.expected}, received {case.received}"
+                    ET.SubElement(
+                        case_el, "failure", message=message, type=case.comparison
+                    ).text = "\n".join([message, *(case.differences or [])])
+
+    ET.ElementTree(root).write(filename, encoding="utf-8", xml_declaration=True)
+
+
+def write_report(kind: str, files: List[FileResult], filename: str):
+    """
+    Write a machine-readable report of a test run, in one of `REPORT_FORMATS`.
+    """
+    if kind == "json":
+        write_json(files, filename)
+    elif kind == "junit":
+        write_junit(files, filename)
+    else:
+        raise ValueError(
+            f"Unknown report format '{kind}', expected one of {REPORT_FORMATS}"
+        )
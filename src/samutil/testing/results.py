@@ -0,0 +1,202 @@
+from typing import List, Optional
+
+
+class CaseResult:
+    """
+    The outcome of a single test case.
+    """
+
+    def __init__(
+        self,
+        subject: str,
+        args: str,
+        comparison: str,
+        passed: bool,
+        time_taken: float,
+        setup_time: float = 0,
+        exception: Optional[str] = None,
+        operator: str = "",
+        expected: str = "",
+        received: str = "",
+        stats: Optional[dict] = None,
+        differences: Optional[List[str]] = None,
+        memory: Optional[dict] = None,
+    ):
+        self.subject = subject
+        self.args = args
+        self.comparison = comparison
+        self.passed = passed
+        self.time_taken = time_taken
+        # Time spent setting up fixtures before the case ran
+        self.setup_time = setup_time
+        self.exception = exception
+        self.operator = operator
+        self.expected = expected
+        self.received = received
+        # Timing statistics, only set for benchmarked cases
+        self.stats = stats
+        # Where the result differed from the expected value, only set by comparisons
+        # which diff them
+        self.differences = differences
+        # Peak and net bytes allocated, only set when memory was measured
+        self.memory = memory
+        # Relative slowdown against a baseline, only set for cases that regressed
+        self.regression: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.subject}({self.args})"
+
+    def to_dict(self) -> dict:
+        return {
+            "subject": self.subject,
+            "args": self.args,
+            "comparison": self.comparison,
+            "operator": self.operator,
+            "expected": self.expected,
+            "received": self.received,
+            "passed": self.passed,
+            "time_taken": self.time_taken,
+            "setup_time": self.setup_time,
+            "exception": self.exception,
+            "stats": self.stats,
+            "differences": self.differences,
+            "memory": self.memory,
+            "regression": self.regression,
+        }
+
+
+class SuiteResult:
+    """
+    The outcomes of every case in a test suite, i.e. a `@test`, `@testmethod`
+    or `describe` block.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cases: List[CaseResult] = []
+        # The combined cProfile stats of its cases, only set with --profile
+        self.profile: Optional[dict] = None
+
+    @property
+    def tests(self) -> int:
+        return len(self.cases)
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for case in self.cases if not case.passed)
+
+    @property
+    def passed(self) -> bool:
+        return self.failures == 0
+
+    @property
+    def time_taken(self) -> float:
+        return sum(case.time_taken for case in self.cases)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "tests": self.tests,
+            "failures": self.failures,
+            "time_taken": self.time_taken,
+            "cases": [case.to_dict() for case in self.cases],
+        }
+
+
+class FileResult:
+    """
+    The outcomes of every suite in a test file.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.suites: List[SuiteResult] = []
+        self.error: Optional[str] = None
+
+    @property
+    def tests(self) -> int:
+        return sum(suite.tests for suite in self.suites)
+
+    @property
+    def failures(self) -> int:
+        return sum(suite.failures for suite in self.suites)
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and self.failures == 0
+
+    @property
+    def time_taken(self) -> float:
+        return sum(suite.time_taken for suite in self.suites)
+
+    def to_dict(self) -> dict:
+        return {
+            "filename": self.filename,
+            "tests": self.tests,
+            "failures": self.failures,
+            "time_taken": self.time_taken,
+            "error": self.error,
+            "suites": [suite.to_dict() for suite in self.suites],
+        }
+
+
+class ResultCollector:
+    """
+    Collects the results of every case run in this process, grouped by file and suite.
+    """
+
+    def __init__(self):
+        self.files: List[FileResult] = []
+
+    def reset(self):
+        self.files = []
+
+    def start_file(self, filename: str) -> FileResult:
+        file = FileResult(filename)
+        self.files.append(file)
+        return file
+
+    def start_suite(self, name: str) -> SuiteResult:
+        if not self.files:
+            self.start_file("<unknown>")
+
+        suite = SuiteResult(name)
+        self.files[-1].suites.append(suite)
+        return suite
+
+    def add_case(self, case: CaseResult):
+        if not self.files or not self.files[-1].suites:
+            # Cases run before any describe call are grouped under their subject
+            self.start_suite(case.subject)
+
+        self.files[-1].suites[-1].cases.append(case)
+
+    @property
+    def suite(self) -> SuiteResult:
+        """
+        The suite cases are currently being added to.
+        """
+        return self.files[-1].suites[-1]
+
+    @property
+    def tests(self) -> int:
+        return sum(file.tests for file in self.files)
+
+    @property
+    def failures(self) -> int:
+        return sum(file.failures for file in self.files)
+
+    @property
+    def errors(self) -> int:
+        """
+        The number of files which raised an error, e.g. when they were imported.
+        """
+        return sum(1 for file in self.files if file.error is not None)
+
+    @property
+    def passed(self) -> bool:
+        return all(file.passed for file in self.files)
+
+
+collector = ResultCollector()
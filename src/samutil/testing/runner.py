@@ -0,0 +1,127 @@
+import io
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from itertools import repeat
+from multiprocessing.util import Finalize
+from typing import List
+
+from samutil.formatting import Formatter as f
+
+from .fixtures import end_scope
+from .reporters import get_reporter, set_reporter
+from .results import FileResult, collector
+from .settings import Settings
+from .utils import run_file
+
+
+class FileRun:
+    """
+    The outcome of running a single test file in a worker process.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        output: str = "",
+        error: str = None,
+        result: FileResult = None,
+    ):
+        self.filename = filename
+        self.output = output
+        self.error = error
+        self.result = result
+
+
+def output_file_error(filename: str, error: str):
+    get_reporter().writeln(f.error(f"Got error when running '{filename}':\n{error}"))
+
+
+def init_worker(settings: dict):
+    """
+    Give a worker process the same settings as the parent process.
+    """
+    Settings.update(**settings)
+    # Workers write to a buffer, which isn't a terminal, so color can't be detected
+    # there
+    f.set_color(Settings.color)
+    set_reporter(None)
+    # Each worker has its own session, which ends when the worker exits.
+    # Workers don't run atexit handlers, but do run multiprocessing's finalizers
+    Finalize(None, end_session, exitpriority=10)
+
+
+def end_session():
+    """
+    Tear down the session scoped fixtures of a worker process. Their output is captured
+    and written in one go, so it isn't interleaved with the output of other workers.
+    """
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        end_scope("session")
+        get_reporter().flush()
+
+    sys.stdout.write(buffer.getvalue())
+    sys.stdout.flush()
+
+
+def run_file_captured(filename: str, search: bool) -> FileRun:
+    """
+    Run the tests in `filename`, capturing everything written to stdout so it
+    can be sent back to the parent process.
+    """
+    # Workers are reused between files, so only send back this file's results
+    collector.reset()
+
+    buffer = io.StringIO()
+    error = None
+    with redirect_stdout(buffer):
+        try:
+            run_file(filename, search=search)
+        except Exception:
+            error = traceback.format_exc()
+
+    if collector.files:
+        result = collector.files[-1]
+    else:
+        result = FileResult(filename)
+    result.error = error
+
+    return FileRun(filename, buffer.getvalue(), error, result)
+
+
+def run_files(filenames: List[str], search: bool, jobs: int = 1):
+    """
+    Run the tests in every file in `filenames`. If `jobs` is greater than 1, files are
+    run on a pool of that many worker processes, and their output is printed in the
+    same order as a serial run. A `jobs` value of 0 uses every available core.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs <= 1 or len(filenames) <= 1:
+        try:
+            for filename in filenames:
+                try:
+                    run_file(filename, search=search)
+                except Exception:
+                    collector.files[-1].error = traceback.format_exc()
+                    output_file_error(filename, collector.files[-1].error)
+        finally:
+            end_scope("session")
+        return
+
+    reporter = get_reporter()
+    workers = min(jobs, len(filenames))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(Settings.to_dict(),)
+    ) as pool:
+        # map yields in submission order, so output stays stable across runs
+        for run in pool.map(run_file_captured, filenames, repeat(search)):
+            collector.files.append(run.result)
+            reporter.write(run.output)
+            if run.error:
+                output_file_error(run.filename, run.error)
+            reporter.flush()
@@ -0,0 +1,33 @@
+class Settings:
+    """
+    Options for the current test run, set by `samutil test`.
+    Worker processes are given a copy of these when they start.
+    """
+
+    # Only print failures in full, and a dot for every passing case
+    quiet = False
+    # Seconds any case may run for before it fails, unless it has its own timeout
+    timeout = None
+    # Whether output is colored, decided once by the parent process
+    color = False
+    # Measure the memory allocated by every case with tracemalloc
+    memory = False
+    # Profile every case with cProfile, keeping the profiles of cases slower than the
+    # threshold
+    profile = False
+    profile_threshold = 0.0
+
+    @classmethod
+    def update(cls, **options):
+        for name, value in options.items():
+            if name.startswith("_") or not hasattr(cls, name):
+                raise AttributeError(f"Unknown setting '{name}'")
+            setattr(cls, name, value)
+
+    @classmethod
+    def to_dict(cls) -> dict:
+        return {
+            name: value
+            for name, value in vars(cls).items()
+            if not name.startswith("_") and not isinstance(value, classmethod)
+        }
@@ -0,0 +1,221 @@
+import string
+from random import Random
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+TEXT_CHARACTERS = string.ascii_letters + string.digits + string.punctuation + " "
+
+
+class Strategy:
+    """
+    Generates random values for an argument of a test case, and simpler versions of a
+    value which made a case fail, so it can be shrunk to a minimal counterexample.
+    """
+
+    def generate(self, rng: Random) -> Any:
+        raise NotImplementedError(
+            f"{type(self).__name__} must implement a 'generate' method"
+        )
+
+    def batch(self, rng: Random, count: int) -> List[Any]:
+        """
+        Generate `count` values at once.
+        """
+        return [self.generate(rng) for _ in range(count)]
+
+    def shrink(self, value: Any) -> Iterator[Any]:
+        """
+        Yield simpler versions of `value`, simplest first.
+        """
+        return iter(())
+
+    def map(self, func: Callable[[Any], Any]) -> "Strategy":
+        """
+        Generate values from this strategy, passed through `func`.
+        """
+        return Mapped(self, func)
+
+
+def as_strategy(value: Any) -> Strategy:
+    """
+    Use a function taking a `random.Random` as a strategy.
+    """
+    if isinstance(value, Strategy):
+        return value
+    if callable(value):
+        return FromFunction(value)
+    raise TypeError(
+        f"Expected a Strategy or a function taking a Random, got {type(value)}"
+    )
+
+
+class Integers(Strategy):
+    def __init__(self, min_value: int = -1000, max_value: int = 1000):
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def generate(self, rng: Random) -> int:
+        return rng.randint(self.min_value, self.max_value)
+
+    def batch(self, rng: Random, count: int) -> List[int]:
+        randint, low, high = rng.randint, self.min_value, self.max_value
+        return [randint(low, high) for _ in range(count)]
+
+    def shrink(self, value: int) -> Iterator[int]:
+        # Move towards 0, or the bound closest to it
+        target = min(max(0, self.min_value), self.max_value)
+        if value == target:
+            return
+        yield target
+
+        delta = value - target
+        while abs(delta) > 1:
+            delta = int(delta / 2)
+            yield value - delta
+        yield value - (1 if value > target else -1)
+
+
+class Floats(Strategy):
+    def __init__(self, min_value: float = -1e6, max_value: float = 1e6):
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def generate(self, rng: Random) -> float:
+        return rng.uniform(self.min_value, self.max_value)
+
+    def shrink(self, value: float) -> Iterator[float]:
+        for candidate in (0.0, float(int(value)), value / 2):
+            if candidate != value and self.min_value <= candidate <= self.max_value:
+                yield candidate
+
+
+class Booleans(Strategy):
+    def generate(self, rng: Random) -> bool:
+        return rng.random() < 0.5
+
+    def shrink(self, value: bool) -> Iterator[bool]:
+        if value:
+            yield False
+
+
+class Just(Strategy):
+    def __init__(self, value: Any):
+        self.value = value
+
+    def generate(self, rng: Random) -> Any:
+        return self.value
+
+
+class SampledFrom(Strategy):
+    def __init__(self, values: Sequence):
+        self.values = list(values)
+
+    def generate(self, rng: Random) -> Any:
+        return rng.choice(self.values)
+
+    def shrink(self, value: Any) -> Iterator[Any]:
+        # Earlier values are simpler
+        for candidate in self.values:
+            if candidate == value:
+                return
+            yield candidate
+
+
+def _shorter(value: Sequence, min_size: int) -> Iterator[Sequence]:
+    """
+    Yield `value` with items removed, from the most removed to a single item removed.
+    """
+    if len(value) <= min_size:
+        return
+    yield value[:min_size]
+
+    size = len(value) // 2
+    while size >= 1:
+        for start in range(0, len(value) - size + 1, size):
+            if len(value) - size >= min_size:
+                yield value[:start] + value[start + size :]
+        size //= 2
+
+
+class Text(Strategy):
+    def __init__(
+        self, alphabet: str = TEXT_CHARACTERS, min_size: int = 0, max_size: int = 20
+    ):
+        self.alphabet = alphabet
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def generate(self, rng: Random) -> str:
+        size = rng.randint(self.min_size, self.max_size)
+        return "".join(rng.choices(self.alphabet, k=size))
+
+    def shrink(self, value: str) -> Iterator[str]:
+        yield from _shorter(value, self.min_size)
+
+        simplest = self.alphabet[0]
+        for i, character in enumerate(value):
+            if character != simplest:
+                yield value[:i] + simplest + value[i + 1 :]
+
+
+class Lists(Strategy):
+    def __init__(
+        self, elements: Strategy = None, min_size: int = 0, max_size: int = 20
+    ):
+        self.elements = as_strategy(elements) if elements is not None else Integers()
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def generate(self, rng: Random) -> list:
+        size = rng.randint(self.min_size, self.max_size)
+        return self.elements.batch(rng, size)
+
+    def shrink(self, value: list) -> Iterator[list]:
+        yield from _shorter(value, self.min_size)
+
+        for i, item in enumerate(value):
+            for candidate in self.elements.shrink(item):
+                yield value[:i] + [candidate] + value[i + 1 :]
+
+
+class Tuples(Strategy):
+    def __init__(self, *elements: Strategy):
+        self.elements = [as_strategy(element) for element in elements]
+
+    def generate(self, rng: Random) -> tuple:
+        return tuple(element.generate(rng) for element in self.elements)
+
+    def shrink(self, value: tuple) -> Iterator[tuple]:
+        for i, (element, item) in enumerate(zip(self.elements, value)):
+            for candidate in element.shrink(item):
+                yield value[:i] + (candidate,) + value[i + 1 :]
+
+
+class FromFunction(Strategy):
+    """
+    Generates values by calling `func` with a `random.Random`. Values are shrunk with
+    `shrink`, a function returning simpler versions of a value, if it's given.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Random], Any],
+        shrink: Callable[[Any], Iterable[Any]] = None,
+    ):
+        self.func = func
+        self._shrink = shrink
+
+    def generate(self, rng: Random) -> Any:
+        return self.func(rng)
+
+    def shrink(self, value: Any) -> Iterator[Any]:
+        if self._shrink is not None:
+            yield from self._shrink(value)
+
+
+class Mapped(Strategy):
+    def __init__(self, strategy: Strategy, func: Callable[[Any], Any]):
+        self.strategy = strategy
+        self.func = func
+
+    def generate(self, rng: Random) -> Any:
+        return self.func(self.strategy.generate(rng))
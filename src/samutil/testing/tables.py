@@ -0,0 +1,124 @@
+import ast
+import csv
+import gzip
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .comparisons import BaseComparison, EqualTo
+
+TABLE_FORMATS = [".csv", ".jsonl"]
+
+# The args, kwargs and expected value of a case
+Row = Tuple[tuple, Dict[str, Any], Any]
+# A comparison class, or a function returning a comparison from an expected value
+ComparisonFactory = Callable[[Any], BaseComparison]
+
+
+class TableError(ValueError):
+    """
+    Raised for a row of a table which can't be read as a test case.
+    """
+
+    def __init__(self, path: str, line: int, message: str):
+        super().__init__(f"{path}:{line}: {message}")
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def table_format(path: str) -> str:
+    """
+    Return the format of a table from its extension, ignoring any `.gz` extension.
+    """
+    _, extension = os.path.splitext(path[:-3] if path.endswith(".gz") else path)
+    if extension not in TABLE_FORMATS:
+        raise ValueError(
+            f.error(
+                f"Can't read cases from '{path}', "
+                f"expected one of {', '.join(TABLE_FORMATS)}"
+            )
+        )
+    return extension
+
+
+def parse_cell(cell: str) -> Any:
+    """
+    Read a CSV cell as a Python literal, e.g. `3`, `[1, 2]` or `'text'`,
+    or as a string if it isn't one.
+    """
+    try:
+        return ast.literal_eval(cell)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return cell
+
+
+def _read_csv(path: str) -> Iterator[Row]:
+    with _open(path) as o:
+        reader = csv.reader(o)
+        header = next(reader, None)
+        if header is None:
+            return
+        if "expected" not in header:
+            raise TableError(path, 1, "no 'expected' column")
+
+        expected_column = header.index("expected")
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(header):
+                raise TableError(
+                    path, reader.line_num, f"{len(row)} columns, expected {len(header)}"
+                )
+
+            values = [parse_cell(cell) for cell in row]
+            expected = values.pop(expected_column)
+            yield tuple(values), {}, expected
+
+
+def _read_jsonl(path: str) -> Iterator[Row]:
+    with _open(path) as o:
+        for number, line in enumerate(o, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise TableError(path, number, f"invalid JSON: {e}") from None
+            if not isinstance(row, dict) or "expected" not in row:
+                raise TableError(
+                    path, number, "expected an object with an 'expected' key"
+                )
+
+            yield tuple(row.get("args", ())), row.get("kwargs", {}), row["expected"]
+
+
+def read_table(path: str) -> Iterator[Row]:
+    """
+    Lazily read the cases in a table, one row at a time.
+
+    In a `.csv` file, the `expected` column is the expected value, and every other
+    column is a positional argument, in order. Cells are read as Python literals.
+    In a `.jsonl` file, each line is an object with an `expected` value, and optional
+    `args` list and `kwargs` object. Either may be gzip compressed,
+    e.g. `cases.jsonl.gz`.
+    """
+    if table_format(path) == ".csv":
+        return _read_csv(path)
+    return _read_jsonl(path)
+
+
+def run_table(test, path: str, comparison: Optional[ComparisonFactory] = None):
+    """
+    Run and report every row of a table as a case of `test`, a `UnitTest`, checking
+    its result with `comparison` created from the row's expected value (`EqualTo` by
+    default).
+    """
+    comparison = comparison or EqualTo
+    for args, kwargs, expected in read_table(path):
+        test.with_args(*args, **kwargs).should_be(comparison(expected))
@@ -0,0 +1,98 @@
+import signal
+import threading
+from time import perf_counter
+from typing import Callable, Optional
+
+from .settings import Settings
+from .types import Value
+
+
+class CaseTimeout(BaseException):
+    """
+    Raised inside a test case which ran for longer than its timeout. It extends
+    BaseException so that a broad `except Exception` in the test subject can't
+    swallow it.
+    """
+
+    def __init__(self, seconds: float):
+        if seconds:
+            super().__init__(f"Timed out after {seconds:.3g} seconds")
+        else:
+            super().__init__("The suite's time budget was used up before this case ran")
+        self.seconds = seconds
+
+
+_suite_deadline: Optional[float] = None
+
+
+def start_suite_timer(seconds: Optional[float] = None):
+    """
+    Start the time budget shared by every case in the suite which is starting.
+    """
+    global _suite_deadline
+    _suite_deadline = perf_counter() + seconds if seconds else None
+
+
+def case_limit(seconds: Optional[float] = None) -> Optional[float]:
+    """
+    Return how long the next case may run for: the smallest of its own timeout
+    (or the global --timeout), and the time left in the suite's budget.
+    """
+    limits = []
+    if seconds or Settings.timeout:
+        limits.append(seconds or Settings.timeout)
+    if _suite_deadline is not None:
+        limits.append(max(_suite_deadline - perf_counter(), 0))
+
+    return min(limits) if limits else None
+
+
+def _call_in_thread(func: Callable[[], Value], seconds: float) -> Value:
+    """
+    Fallback for platforms without SIGALRM, or when not on the main thread.
+    A case that times out is abandoned on a daemon thread, as threads can't be killed.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+
+    if thread.is_alive():
+        raise CaseTimeout(seconds)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def call_with_timeout(func: Callable[[], Value], seconds: Optional[float]) -> Value:
+    """
+    Call `func`, raising `CaseTimeout` if it runs for longer than `seconds`.
+    """
+    if seconds is None:
+        return func()
+    if seconds <= 0:
+        # The suite's time budget has already been used up
+        raise CaseTimeout(0)
+
+    if not hasattr(signal, "setitimer") or (
+        threading.current_thread() is not threading.main_thread()
+    ):
+        return _call_in_thread(func, seconds)
+
+    def handler(signum, frame):
+        raise CaseTimeout(seconds)
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return func()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -1,44 +1,121 @@
+import asyncio
 import importlib.util
+import inspect
 import os
+from functools import partial
 from types import FunctionType, ModuleType
-from typing import Callable, Tuple
+from typing import Awaitable, Callable, List, Tuple
 
 import click
 from click.types import Path
-from samutil.formatting import Formatter as f
 
+from .benchmark import Benchmark
+from .fixtures import end_scope
+from .reporters import get_reporter
+from .results import collector
 from .types import TestSubject, Value
 
+IGNORE_DIRS = ["__pycache__", "venv", "env", "virtualenv", "build", "dist"]
+
+
+_loop = None
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop used to run coroutine test subjects in this process.
+    It is reused between cases, rather than creating a new loop for every call.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def run_coroutine(awaitable: Awaitable) -> Value:
+    """
+    Run an awaitable to completion on the event loop and return its result.
+    """
+    loop = event_loop()
+    task = asyncio.ensure_future(awaitable, loop=loop)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        # e.g. a timeout interrupted the loop, so don't leave the task pending
+        task.cancel()
+        try:
+            loop.run_until_complete(task)
+        except BaseException:
+            pass
+        raise
+
+
+def call_subject(obj: object, *args, **kwargs) -> Value:
+    """
+    Call a test subject with the args. Coroutine functions return an awaitable.
+    """
+    if getattr(obj, "_is_class", False) and (not isinstance(obj, FunctionType)):
+        return obj(obj._parent(), *args, **kwargs)
+    return obj(*args, **kwargs)
+
 
 def call_if_callable(obj: object, *args, **kwargs) -> Tuple[Value, float]:
     """
     Take an object and any amout of args, and call the object with the args
-    if it can be called, with performance metrics.
+    if it can be called, with performance metrics. Coroutines are run to completion.
     """
     if callable(obj):
-        if getattr(obj, "_is_class", False) and (not isinstance(obj, FunctionType)):
-            response = obj(obj._parent(), *args, **kwargs)
-        else:
-            response = obj(*args, **kwargs)
+        response = call_subject(obj, *args, **kwargs)
+        if inspect.isawaitable(response):
+            response = run_coroutine(response)
         return response
     else:
         return obj, 0
 
 
+def bind_args(obj: Callable, *args, **kwargs) -> partial:
+    """
+    Return `obj` with the args bound, including an instance of its class if it's a
+    method, so calling it doesn't go through any of samutil's own functions.
+    """
+    if getattr(obj, "_is_class", False) and (not isinstance(obj, FunctionType)):
+        return partial(obj, obj._parent(), *args, **kwargs)
+    return partial(obj, *args, **kwargs)
+
+
+def bind_subject(obj: object, *args, **kwargs) -> Callable:
+    """
+    Return a callable taking no arguments which calls `obj` with the args, in the
+    same way as `call_if_callable`, but without its per-call checks.
+    """
+    if callable(obj):
+        if getattr(obj, "_is_class", False) and (not isinstance(obj, FunctionType)):
+
+            def call():
+                return obj(obj._parent(), *args, **kwargs)
+
+        else:
+            call = partial(obj, *args, **kwargs)
+
+        if inspect.iscoroutinefunction(obj):
+            return lambda: run_coroutine(call())
+        return call
+    else:
+        return lambda: obj
+
+
 def output_case_args(test_subject: TestSubject, *args, **kwargs):
     """
     Take a test subject and all of the test's arguments and output it nicely.
     """
-    formatted_kwargs = [f"{k}={v}" for (k, v) in kwargs.items()]
-    args = tuple(map(str, args))
-    formatted_args = ", ".join([*args, *formatted_kwargs])
-    formatted_output = f.bold(test_subject.__name__ + "(" + formatted_args + ")")
-    print(f.info("  RUNS", f.bold(formatted_output), "\b:"))
+    get_reporter().case_start(test_subject, args, kwargs)
 
 
 def lazy_run_test(test, *args, comparison, **kwargs) -> Callable:
     case = test.with_args(*args, **kwargs)
 
+    if isinstance(comparison, Benchmark):
+        return lambda: case.benchmark(comparison)
     return lambda: case.should_be(comparison)
 
 
@@ -48,17 +125,18 @@ def make_lazy_run_test(*args, comparison, **kwargs):
 
 def import_file(filename: str, search: bool) -> ModuleType:
     """
-    Import the contents of a file and return it as a module
+    Import the contents of a file and return it as a module. Errors are raised, unless
+    `search` is set, i.e. the file was only imported to look for tests in it.
     """
 
     spec = importlib.util.spec_from_file_location("mod", filename)
     mod = importlib.util.module_from_spec(spec)
     try:
         spec.loader.exec_module(mod)
-    except Exception as e:
-        if not search:
-            print(f.error(f"Got error: '{e}' when executing '{filename}', skipping..."))
-        return
+    except Exception:
+        if search:
+            return
+        raise
 
     return mod
 
@@ -79,7 +157,7 @@ def test_file(filename: str, search: bool):
             # func is a tuple in the form ('func_name', actual_func)
             func = func[1]
             if callable(func) and hasattr(func, "_run_tests"):
-                print(f.bold("\nFile:", filename))
+                get_reporter().file_header(filename)
                 for test in func._run_tests[::-1]:
                     test(func)
 
@@ -92,18 +170,43 @@ def test_test_file(filename: str):
         exec(code)
 
 
-def test_dir(dir: Path, search: bool):
-    ignore_dirs = ["__pycache__", "venv", "env", "virtualenv", "build", "dist"]
+def collect_files(dir: Path) -> List[str]:
+    """
+    Recursively collect every `.py` file under `dir`, in the same order
+    that `test_dir` would run them.
+    """
+    filenames = []
     dirname = click.format_filename(dir)
     for file in os.listdir(dirname):
         filename = os.path.join(dirname, file)
 
         if os.path.isdir(filename):
-            if filename not in ignore_dirs:
-                test_dir(filename, search=search)
-        elif os.path.isfile(filename):
-            if filename.endswith(".py"):
-                if filename.endswith(".test.py"):
-                    test_test_file(filename)
-                else:
-                    test_file(filename, search=search)
+            if file not in IGNORE_DIRS:
+                filenames.extend(collect_files(filename))
+        elif os.path.isfile(filename) and filename.endswith(".py"):
+            filenames.append(filename)
+
+    return filenames
+
+
+def run_file(filename: str, search: bool):
+    """
+    Run the tests in `filename`, either by executing it as a `.test.py` file or by
+    importing it and running any functions decorated with @test or @testmethod.
+    """
+    collector.start_file(filename)
+    reporter = get_reporter()
+    reporter.file_start(filename)
+    try:
+        if filename.endswith(".test.py"):
+            test_test_file(filename)
+        else:
+            test_file(filename, search=search)
+    finally:
+        end_scope("file")
+        reporter.file_end(filename)
+
+
+def test_dir(dir: Path, search: bool):
+    for filename in collect_files(dir):
+        run_file(filename, search=search)
@@ -0,0 +1,231 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+from samutil.formatting import Formatter as f
+
+from .cache import TestCache
+from .utils import IGNORE_DIRS, collect_files
+
+# The paths of every changed file, and whether a file or directory was added or removed
+Changes = Tuple[Set[str], bool]
+
+# Flags from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0x00080000
+
+# Events which add or remove an entry in a directory, rather than changing a file
+DIRECTORY_EVENTS = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+WATCH_MASK = IN_CLOSE_WRITE | DIRECTORY_EVENTS
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def normalize(filename: str) -> str:
+    return os.path.normpath(os.path.abspath(filename))
+
+
+class PollingWatcher:
+    """
+    Detects changes to `.py` files by comparing their modification times every
+    `interval` seconds.
+    """
+
+    def __init__(self, root: str = ".", interval: float = 0.5):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self.snapshot()
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for filename in collect_files(self.root):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            snapshot[normalize(filename)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self) -> Changes:
+        """
+        Block until at least 1 file changes, and return the paths of every changed file.
+        """
+        while True:
+            time.sleep(self.interval)
+            snapshot = self.snapshot()
+            changed = {
+                filename
+                for filename in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(filename) != self._snapshot.get(filename)
+            }
+            moved = snapshot.keys() != self._snapshot.keys()
+            self._snapshot = snapshot
+            if changed:
+                return changed, moved
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects changes to `.py` files using Linux's inotify API, so no time is spent
+    polling while nothing changes.
+    """
+
+    def __init__(self, root: str = ".", debounce: float = 0.1):
+        self.debounce = debounce
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(root)
+
+    def _add_tree(self, root: str):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dirpath), WATCH_MASK
+            )
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"Could not watch '{dirpath}'")
+            self._dirs[wd] = dirpath
+
+    def _read(self) -> Changes:
+        changed = set()
+        moved = False
+        data = os.read(self._fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            path = os.path.join(self._dirs.get(wd, ""), name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in IGNORE_DIRS:
+                    self._add_tree(path)
+                moved = True
+            elif name.endswith(".py"):
+                changed.add(normalize(path))
+                moved = moved or bool(mask & DIRECTORY_EVENTS)
+        return changed, moved
+
+    def wait(self) -> Changes:
+        """
+        Block until at least 1 file changes, and return the paths of every changed file.
+        Raises `OSError` if a new directory can't be watched.
+        """
+        while True:
+            select.select([self._fd], [], [])
+            changed, moved = self._read()
+
+            # Editors often write a file in several steps, so collect them into 1 change
+            while select.select([self._fd], [], [], self.debounce)[0]:
+                more, more_moved = self._read()
+                changed |= more
+                moved = moved or more_moved
+
+            if changed:
+                return changed, moved
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(root: str = "."):
+    """
+    Use inotify where it's available, and fall back to polling.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+def unload_modules(cache: TestCache, changed: Set[str]):
+    """
+    Remove local modules which are, or import, any changed file from `sys.modules`,
+    so they are executed again on the next import. Everything else stays loaded.
+    """
+    cwd = os.getcwd()
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None)
+        if not filename or not filename.endswith(".py"):
+            continue
+
+        filename = normalize(filename)
+        if not filename.startswith(cwd) or not os.path.isfile(filename):
+            continue
+
+        if cache.inputs(filename) & changed:
+            del sys.modules[name]
+
+
+def watch(
+    collect: Callable[[], List[str]], run: Callable[[List[str]], None], root: str = "."
+):
+    """
+    Run every file returned by `collect`, then keep running and re-run only the files
+    whose sources, or local imports, change. Stops on Ctrl+C.
+    """
+    cache = TestCache()
+    targets = collect()
+    run(targets)
+
+    watcher = create_watcher(root)
+    print(f.info("\nWatching for changes, press Ctrl+C to stop..."))
+    try:
+        while True:
+            try:
+                changed, moved = watcher.wait()
+            except OSError as e:
+                print(
+                    f.warning(
+                        f"Can't watch for changes with inotify ({e}), polling instead"
+                    )
+                )
+                watcher.close()
+                watcher = PollingWatcher(root)
+                targets = collect()
+                continue
+
+            cache.forget(changed)
+            unload_modules(cache, changed)
+
+            # Test files are only found again if a file was added or removed, or if a
+            # file which isn't a test file or imported by one changed, as it may now
+            # have tests
+            known = set().union(*(cache.inputs(target) for target in targets))
+            if moved or not changed <= known:
+                targets = collect()
+
+            affected = [target for target in targets if cache.inputs(target) & changed]
+            if not affected:
+                continue
+
+            print(
+                f.bold(
+                    "\nChanged:", ", ".join(os.path.relpath(c) for c in sorted(changed))
+                )
+            )
+            run(affected)
+            print(f.info("\nWatching for changes, press Ctrl+C to stop..."))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()